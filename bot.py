@@ -1,10 +1,13 @@
+import asyncio
 import logging
 
+from discord.ext import commands
+
 from currency_feature import setup_currency_feature
 from dinner_feature import setup_dinner_feature
 from feature_menu import setup_menu_feature
 from voice_tracker import create_bot, load_config
-from weather_feature import register_weather_commands
+from weather_feature import register_weather_commands, setup_weather_feature
 
 
 def main() -> None:
@@ -16,9 +19,19 @@ def main() -> None:
     bot = create_bot(config)
     register_weather_commands(bot)
     setup_menu_feature(bot)
-    setup_currency_feature(bot)
     setup_dinner_feature(bot)
-    bot.run(config.token)
+    try:
+        asyncio.run(_run(bot, config.token))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run(bot: commands.Bot, token: str) -> None:
+    # Cog 需在事件迴圈中載入；離開 async with 時 bot.close() 會卸載所有 Cog
+    async with bot:
+        await setup_currency_feature(bot)
+        await setup_weather_feature(bot)
+        await bot.start(token)
 
 
 if __name__ == "__main__":
@@ -6,14 +6,24 @@ from __future__ import annotations
 
 import asyncio
 import io
+import logging
+import re
+import ssl
+import time
 from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List, Tuple
+from functools import lru_cache
+from string import Template
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Dict, List, Tuple
 
 import discord
 from discord import app_commands
+from discord.ext import commands
 import httpx
 import certifi
+import orjson
+
+log = logging.getLogger(__name__)
 
 # ============ 設定 ============
 
@@ -50,11 +60,96 @@ for group in CURRENCY_GROUPS.values():
 
 BASE_CURRENCY = "TWD"  # 基準貨幣：新台幣
 CACHE_TTL = 300  # 快取 5 分鐘
+CACHE_STALE_TTL = CACHE_TTL * 2  # 過期後仍可先回傳舊資料（背景刷新）的時間上限
+MAX_CACHE_ENTRIES = 128  # 快取項目上限
+MAX_CHART_CACHE_ENTRIES = 32  # 走勢圖快取上限
 HISTORY_DAYS = 90  # 歷史數據天數
-HISTORY_CACHE_VERSION = "v2"
+HISTORY_CACHE_VERSION = "v3"
+PREWARM_CONCURRENCY = 5  # 啟動預熱時的同時請求數
+
+# HTTP 連線設定
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())  # 憑證只解析一次
+HTTP_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=60.0)
+
+# 走勢圖尺寸
+CHART_WIDTH = 500
+CHART_HEIGHT = 220
+CHART_PADDING = 45
+
+# SVG 外框（$width 等幾何參數依尺寸預先代入，其餘為每次繪圖的動態欄位）
+_CHART_SVG = Template('''<?xml version="1.0" encoding="UTF-8"?>
+<svg width="$width" height="$height" xmlns="http://www.w3.org/2000/svg">
+    <defs>
+        <linearGradient id="lineGradient" x1="0%" y1="0%" x2="100%" y2="0%">
+            <stop offset="0%" style="stop-color:$trend_color;stop-opacity:0.6"/>
+            <stop offset="100%" style="stop-color:$trend_color;stop-opacity:1"/>
+        </linearGradient>
+        <linearGradient id="areaGradient" x1="0%" y1="0%" x2="0%" y2="100%">
+            <stop offset="0%" style="stop-color:$trend_color;stop-opacity:0.25"/>
+            <stop offset="100%" style="stop-color:$trend_color;stop-opacity:0.05"/>
+        </linearGradient>
+    </defs>
+    <rect width="$width" height="$height" fill="#2b2d31" rx="10"/>
+    <text x="$center_x" y="25" fill="#f8fafc" font-size="14" font-family="Arial" text-anchor="middle">$title</text>
+    <g stroke="#3f4147" stroke-width="1" stroke-dasharray="4,4">
+        <line x1="$padding" y1="$padding" x2="$right" y2="$padding"/>
+        <line x1="$padding" y1="$mid_y" x2="$right" y2="$mid_y"/>
+        <line x1="$padding" y1="$bottom" x2="$right" y2="$bottom"/>
+    </g>
+    <path d="M $path_body" fill="none" stroke="url(#lineGradient)" stroke-width="2.8" stroke-linecap="round" stroke-linejoin="round"/>
+    <path d="M $path_body L $right,$bottom L $padding,$bottom Z" fill="url(#areaGradient)" opacity="0.7"/>
+    <circle cx="$last_x" cy="$last_y" r="4" fill="$trend_color"/>
+    <text x="$padding" y="$top_label_y" fill="#94a3b8" font-size="11" font-family="Arial">最高 $max_rate</text>
+    <text x="$padding" y="$bottom_label_y" fill="#94a3b8" font-size="11" font-family="Arial">最低 $min_rate</text>
+    <text x="$right" y="$top_label_y" fill="$trend_color" font-size="12" font-family="Arial" text-anchor="end">$change</text>
+    $x_labels
+</svg>''')
+
+
+@lru_cache(maxsize=32)
+def _chart_x_coords(count: int, width: int) -> Tuple[str, ...]:
+    """預先格式化走勢圖各點的 X 座標"""
+    x_step = (width - CHART_PADDING * 2) / (count - 1)
+    return tuple(f"{CHART_PADDING + idx * x_step:.1f}" for idx in range(count))
+
+
+_TEMPLATE_FIELD = re.compile(r"\$(\w+)")
+
+
+@lru_cache(maxsize=8)
+def _chart_fragments(width: int, height: int) -> Tuple[Tuple[bytes, ...], Tuple[str, ...]]:
+    """依圖表尺寸預先代入靜態幾何參數，切成已編碼的靜態片段與動態欄位名稱
+
+    回傳 (statics, fields)，len(statics) == len(fields) + 1，
+    輸出時依序交錯為 statics[0], fields[0], statics[1], ...
+    """
+    chart_height = height - CHART_PADDING * 2
+    text = _CHART_SVG.safe_substitute(
+        width=width,
+        height=height,
+        center_x=width / 2,
+        padding=CHART_PADDING,
+        right=width - CHART_PADDING,
+        mid_y=CHART_PADDING + chart_height / 2,
+        bottom=height - CHART_PADDING,
+        top_label_y=CHART_PADDING - 10,
+        bottom_label_y=height - CHART_PADDING + 20,
+    )
+    pieces = _TEMPLATE_FIELD.split(text)
+    return tuple(piece.encode("utf-8") for piece in pieces[0::2]), tuple(pieces[1::2])
+
 
 # ============ 服務類別 ============
 
+class HistoryDigest(NamedTuple):
+    """歷史匯率（依日期排序），解析時一併算好最高/最低值"""
+    dates: Tuple[str, ...]
+    rates: Tuple[float, ...]
+    rmin: float
+    rmax: float
+
+
 class CurrencyError(Exception):
     """匯率查詢錯誤"""
     pass
@@ -66,9 +161,19 @@ class CurrencyService:
     _instance: Optional["CurrencyService"] = None
     
     def __init__(self) -> None:
-        self._client: Optional[httpx.AsyncClient] = None
-        self._cache: Dict[str, Tuple[float, dict]] = {}  # {key: (timestamp, data)}
-        self._lock = asyncio.Lock()
+        # 長駐連線池：重用 TCP/TLS 連線，HTTP/2 可在同一連線上多工
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=HTTP_TIMEOUT,
+            limits=HTTP_LIMITS,
+            verify=_SSL_CONTEXT,
+        )
+        # LRU 快取 {key: (monotonic 時間, data)}，最舊的項目優先淘汰
+        self._cache: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        # 進行中的查詢：同一 key 的並行請求共用同一個 Task，只打一次 API
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # 走勢圖快取 {(currency, 最後日期, title): svg bytes}，歷史資料每日才變動
+        self._chart_cache: OrderedDict[Tuple[str, str, str], bytes] = OrderedDict()
     
     @classmethod
     def get_instance(cls) -> "CurrencyService":
@@ -76,21 +181,31 @@ class CurrencyService:
             cls._instance = cls()
         return cls._instance
     
-    async def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=15.0, verify=certifi.where())
-        return self._client
-    
     async def close(self) -> None:
-        if self._client and not self._client.is_closed:
+        if not self._client.is_closed:
             await self._client.aclose()
-            self._client = None
     
-    def _is_cache_valid(self, key: str) -> bool:
-        if key not in self._cache:
-            return False
-        timestamp, _ = self._cache[key]
-        return (datetime.now().timestamp() - timestamp) < CACHE_TTL
+    def _get_cached(self, key: str) -> Tuple[Optional[Any], bool]:
+        """回傳 (快取資料, 是否已過期需背景刷新)；超過 CACHE_STALE_TTL 視為沒有快取"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None, False
+        age = time.monotonic() - entry[0]
+        if age >= CACHE_STALE_TTL:
+            return None, False
+        self._cache.move_to_end(key)
+        return entry[1], age >= CACHE_TTL
+    
+    def _store_cache(self, key: str, data: Any) -> None:
+        """寫入快取，順便清除過期項目並限制總數"""
+        now = time.monotonic()
+        self._cache[key] = (now, data)
+        self._cache.move_to_end(key)
+        expired = [k for k, (ts, _) in self._cache.items() if now - ts >= CACHE_STALE_TTL]
+        for k in expired:
+            del self._cache[k]
+        while len(self._cache) > MAX_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
     
     def clear_rate_cache(self, currency: str) -> None:
         """清除指定貨幣的匯率快取"""
@@ -98,6 +213,30 @@ class CurrencyService:
         if cache_key in self._cache:
             del self._cache[cache_key]
     
+    def _start_fetch(self, key: str, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """取得（或建立）該 key 進行中的查詢 Task"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            
+            def _forget(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            
+            task.add_done_callback(_forget)
+        return task
+    
+    async def _run_once(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """合併同一 key 的並行查詢，網路 I/O 期間不持有任何鎖"""
+        # shield：單一呼叫者被取消時不影響其他等待同一查詢的人
+        return await asyncio.shield(self._start_fetch(key, factory))
+    
+    def _refresh_in_background(self, key: str, factory: Callable[[], Awaitable[Any]]) -> None:
+        """過期資料先回傳，同時在背景刷新（失敗時保留舊資料）"""
+        task = self._start_fetch(key, factory)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
     async def get_current_rate(self, currency: str, force_refresh: bool = False) -> dict:
         """取得目前匯率（1 外幣 = ? 台幣）"""
         cache_key = f"rate_{currency}"
@@ -106,19 +245,23 @@ class CurrencyService:
         if force_refresh:
             self.clear_rate_cache(currency)
         
-        async with self._lock:
-            if self._is_cache_valid(cache_key):
-                return self._cache[cache_key][1]
-        
-        client = await self._get_client()
+        factory = lambda: self._fetch_current_rate(currency, cache_key)
+        cached, stale = self._get_cached(cache_key)
+        if cached is not None:
+            if stale:
+                self._refresh_in_background(cache_key, factory)
+            return cached
         
+        return await self._run_once(cache_key, factory)
+    
+    async def _fetch_current_rate(self, currency: str, cache_key: str) -> dict:
         # 使用免費的 exchangerate-api.com
         url = f"https://api.exchangerate-api.com/v4/latest/{currency}"
         
         try:
-            resp = await client.get(url)
+            resp = await self._client.get(url)
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
             
             twd_rate = data["rates"].get("TWD")
             if twd_rate is None:
@@ -131,9 +274,7 @@ class CurrencyService:
                 "updated_at": datetime.now(),
             }
             
-            async with self._lock:
-                self._cache[cache_key] = (datetime.now().timestamp(), result)
-            
+            self._store_cache(cache_key, result)
             return result
             
         except httpx.HTTPStatusError as e:
@@ -141,22 +282,25 @@ class CurrencyService:
         except Exception as e:
             raise CurrencyError(f"查詢失敗：{str(e)}")
     
-    async def get_history_rates(self, currency: str, days: int = HISTORY_DAYS) -> List[Tuple[str, float]]:
-        """取得歷史匯率數據"""
+    async def get_history_rates(self, currency: str, days: int = HISTORY_DAYS) -> Optional[HistoryDigest]:
+        """取得歷史匯率數據（無資料時回傳 None）"""
         cache_key = f"history_{HISTORY_CACHE_VERSION}_{currency}_{days}"
         
-        async with self._lock:
-            if self._is_cache_valid(cache_key):
-                cached = self._cache[cache_key][1]
-                if cached and len(cached) >= 2:
-                    return cached
+        factory = lambda: self._fetch_history_rates(currency, days, cache_key)
+        cached, stale = self._get_cached(cache_key)
+        if cached is not None:
+            if stale:
+                self._refresh_in_background(cache_key, factory)
+            return cached
         
-        client = await self._get_client()
+        return await self._run_once(cache_key, factory)
+    
+    async def _fetch_history_rates(self, currency: str, days: int, cache_key: str) -> Optional[HistoryDigest]:
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=days)
-        history: List[Tuple[str, float]] = []
+        history: Optional[HistoryDigest] = None
         
-        # 先嘗試直接查詢 1 {currency} = ? TWD，失敗再反向查詢
+        # 同時查詢 1 {currency} = ? TWD 與反向匯率，採用最先回傳有效資料的結果
         url_candidates = [
             (
                 f"https://api.exchangerate.host/timeseries?base={currency}&symbols=TWD"
@@ -169,117 +313,151 @@ class CurrencyService:
                 True,
             ),
         ]
-        
-        for url, need_inverse in url_candidates:
-            try:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                data = resp.json()
-                if not data.get("success", False):
-                    continue
-                rates = data.get("rates", {})
-                parsed: List[Tuple[str, float]] = []
-                for date, values in sorted(rates.items()):
-                    val = values.get("TWD" if not need_inverse else currency)
-                    if not val:
-                        continue
-                    parsed.append((date, (1 / val) if need_inverse else val))
-                if parsed:
-                    history = parsed
+        tasks = [
+            asyncio.ensure_future(self._fetch_history_candidate(url, currency, need_inverse))
+            for url, need_inverse in url_candidates
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                history = await next_done
+                if history is not None:
                     break
-            except Exception:
-                continue
+        finally:
+            for task in tasks:
+                task.cancel()
         
-        if history and len(history) >= 2:
-            async with self._lock:
-                self._cache[cache_key] = (datetime.now().timestamp(), history)
-            return history
-        return []
-    
-        def build_monthly_history(self, history: List[Tuple[str, float]], months: int = 6) -> List[Tuple[str, float]]:
-                """將每日歷史數據轉為月平均"""
-                if not history:
-                        return []
-                monthly: OrderedDict[str, List[float]] = OrderedDict()
-                for date_str, rate in history:
-                        month = date_str[:7]
-                        monthly.setdefault(month, []).append(rate)
-                averaged = [
-                        (month, sum(values) / len(values))
-                        for month, values in monthly.items()
-                ]
-                return averaged[-months:]
-
-        def generate_line_chart(
-                self,
-                history: List[Tuple[str, float]],
-                title: str,
-                width: int = 500,
-                height: int = 220,
-        ) -> Optional[bytes]:
-                if not history or len(history) < 2:
-                        return None
-
-                labels = [label for label, _ in history]
-                rates = [rate for _, rate in history]
-                min_rate = min(rates)
-                max_rate = max(rates)
-                rate_range = max_rate - min_rate or 1e-9
-
-                svg_width = width
-                svg_height = height
-                padding = 45
-                chart_width = svg_width - padding * 2
-                chart_height = svg_height - padding * 2
-
-                points = []
-                for idx, rate in enumerate(rates):
-                        x = padding + (idx / (len(rates) - 1)) * chart_width
-                        y = padding + chart_height - ((rate - min_rate) / rate_range) * chart_height
-                        points.append(f"{x:.1f},{y:.1f}")
-
-                first_rate = rates[0]
-                last_rate = rates[-1]
-                change_pct = ((last_rate - first_rate) / first_rate) * 100 if first_rate else 0
-                trend_color = "#22c55e" if change_pct >= 0 else "#ef4444"
-
-                # X 軸標籤（首、中、尾）
-                label_positions = []
-                if labels:
-                        label_positions.append((padding, labels[0]))
-                        mid_idx = len(labels) // 2
-                        label_positions.append((padding + (mid_idx / (len(labels) - 1)) * chart_width, labels[mid_idx]))
-                        label_positions.append((padding + chart_width, labels[-1]))
-
-                svg = f'''<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{svg_width}" height="{svg_height}" xmlns="http://www.w3.org/2000/svg">
-    <defs>
-        <linearGradient id="lineGradient" x1="0%" y1="0%" x2="100%" y2="0%">
-            <stop offset="0%" style="stop-color:{trend_color};stop-opacity:0.6"/>
-            <stop offset="100%" style="stop-color:{trend_color};stop-opacity:1"/>
-        </linearGradient>
-        <linearGradient id="areaGradient" x1="0%" y1="0%" x2="0%" y2="100%">
-            <stop offset="0%" style="stop-color:{trend_color};stop-opacity:0.25"/>
-            <stop offset="100%" style="stop-color:{trend_color};stop-opacity:0.05"/>
-        </linearGradient>
-    </defs>
-    <rect width="{svg_width}" height="{svg_height}" fill="#2b2d31" rx="10"/>
-    <text x="{svg_width/2}" y="25" fill="#f8fafc" font-size="14" font-family="Arial" text-anchor="middle">{title}</text>
-    <g stroke="#3f4147" stroke-width="1" stroke-dasharray="4,4">
-        <line x1="{padding}" y1="{padding}" x2="{svg_width - padding}" y2="{padding}"/>
-        <line x1="{padding}" y1="{padding + chart_height/2}" x2="{svg_width - padding}" y2="{padding + chart_height/2}"/>
-        <line x1="{padding}" y1="{svg_height - padding}" x2="{svg_width - padding}" y2="{svg_height - padding}"/>
-    </g>
-    <path d="M {points[0]} L {' L '.join(points[1:])}" fill="none" stroke="url(#lineGradient)" stroke-width="2.8" stroke-linecap="round" stroke-linejoin="round"/>
-    <path d="M {points[0]} L {' L '.join(points[1:])} L {svg_width - padding},{svg_height - padding} L {padding},{svg_height - padding} Z" fill="url(#areaGradient)" opacity="0.7"/>
-    <circle cx="{points[-1].split(',')[0]}" cy="{points[-1].split(',')[1]}" r="4" fill="{trend_color}"/>
-    <text x="{padding}" y="{padding - 10}" fill="#94a3b8" font-size="11" font-family="Arial">最高 {max_rate:.4f}</text>
-    <text x="{padding}" y="{svg_height - padding + 20}" fill="#94a3b8" font-size="11" font-family="Arial">最低 {min_rate:.4f}</text>
-    <text x="{svg_width - padding}" y="{padding - 10}" fill="{trend_color}" font-size="12" font-family="Arial" text-anchor="end">{'+' if change_pct >= 0 else ''}{change_pct:.2f}%</text>
-    {''.join(f'<text x="{pos:.1f}" y="{svg_height - 10}" fill="#cbd5f5" font-size="11" font-family="Arial" text-anchor="middle">{label}</text>' for pos, label in label_positions)}
-</svg>'''
+        if history is not None:
+            self._store_cache(cache_key, history)
+        return history
+    
+    async def _fetch_history_candidate(
+        self, url: str, currency: str, need_inverse: bool
+    ) -> Optional[HistoryDigest]:
+        """查詢單一歷史匯率來源，失敗或不足兩筆時回傳 None"""
+        try:
+            resp = await self._client.get(url)
+            resp.raise_for_status()
+            data = orjson.loads(resp.content)
+            if not data.get("success", False):
+                return None
+            rates = data.get("rates", {})
+            symbol = currency if need_inverse else "TWD"
+            # API 通常已依日期排序，timsort 對已排序資料只需線性掃描
+            parsed = [(date, val) for date, values in sorted(rates.items()) if (val := values.get(symbol))]
+            if len(parsed) < 2:
+                return None
+            dates, values = zip(*parsed)
+            if need_inverse:
+                values = tuple(1 / val for val in values)
+            # 最高/最低值在解析時算好一次，之後繪圖與漲跌計算直接使用
+            return HistoryDigest(dates, values, min(values), max(values))
+        except Exception:
+            return None
+    
+    def build_monthly_history(self, history: Optional[HistoryDigest], months: int = 6) -> List[Tuple[str, float]]:
+        """將每日歷史數據轉為月平均"""
+        if history is None:
+            return []
+        # 單次走訪累加總和與筆數，不保留每月的完整數列
+        totals: Dict[str, List[float]] = {}
+        for date_str, rate in zip(history.dates, history.rates):
+            acc = totals.get(date_str[:7])
+            if acc is None:
+                totals[date_str[:7]] = [rate, 1]
+            else:
+                acc[0] += rate
+                acc[1] += 1
+        averaged = [
+            (month, total / count)
+            for month, (total, count) in totals.items()
+        ]
+        return averaged[-months:]
+    
+    async def get_or_build_chart(
+        self, currency: str, history: Optional[HistoryDigest], title: str
+    ) -> Optional[bytes]:
+        """取得走勢圖（同一貨幣、同一資料日期只繪製一次）"""
+        if history is None:
+            return None
+        key = (currency, history.dates[-1], title)
+        chart = self._chart_cache.get(key)
+        if chart is not None:
+            self._chart_cache.move_to_end(key)
+            return chart
+        # 繪圖為純 CPU 運算，交給執行緒池避免阻塞事件迴圈（心跳）；快取只在事件迴圈中讀寫
+        loop = asyncio.get_running_loop()
+        chart = await loop.run_in_executor(None, self.generate_line_chart, history, title)
+        if chart:
+            self._chart_cache[key] = chart
+            while len(self._chart_cache) > MAX_CHART_CACHE_ENTRIES:
+                self._chart_cache.popitem(last=False)
+        return chart
+    
+    def generate_line_chart(
+        self,
+        history: Optional[HistoryDigest],
+        title: str,
+        width: int = CHART_WIDTH,
+        height: int = CHART_HEIGHT,
+    ) -> Optional[bytes]:
+        if history is None or len(history.rates) < 2:
+            return None
+
+        rates = history.rates
+        min_rate = history.rmin
+        max_rate = history.rmax
+        rate_range = max_rate - min_rate or 1e-9
+
+        chart_width = width - CHART_PADDING * 2
+        chart_height = height - CHART_PADDING * 2
+        x_step = chart_width / (len(rates) - 1)
+        y_scale = chart_height / rate_range
+        bottom = CHART_PADDING + chart_height
+
+        # X 座標只與點數、寬度有關，使用快取的格式化字串，每點只需格式化 Y
+        x_coords = _chart_x_coords(len(rates), width)
+        ys = [bottom - (rate - min_rate) * y_scale for rate in rates]
+        path_body = " L ".join(f"{x},{y:.1f}" for x, y in zip(x_coords, ys))
+        last_x, last_y = x_coords[-1], f"{ys[-1]:.1f}"
+
+        first_rate = rates[0]
+        last_rate = rates[-1]
+        change_pct = ((last_rate - first_rate) / first_rate) * 100 if first_rate else 0
+        trend_color = "#22c55e" if change_pct >= 0 else "#ef4444"
+
+        # X 軸標籤（首、中、尾）
+        dates = history.dates
+        mid_idx = len(dates) // 2
+        label_positions = (
+            (CHART_PADDING, dates[0]),
+            (CHART_PADDING + mid_idx * x_step, dates[mid_idx]),
+            (CHART_PADDING + chart_width, dates[-1]),
+        )
+        label_y = height - 10
+        x_labels = "".join(
+            f'<text x="{pos:.1f}" y="{label_y}" fill="#cbd5f5" font-size="11" '
+            f'font-family="Arial" text-anchor="middle">{label}</text>'
+            for pos, label in label_positions
+        )
 
-                return svg.encode('utf-8')
+        values = {
+            "trend_color": trend_color,
+            "title": title,
+            "path_body": path_body,
+            "last_x": last_x,
+            "last_y": last_y,
+            "max_rate": f"{max_rate:.4f}",
+            "min_rate": f"{min_rate:.4f}",
+            "change": f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%",
+            "x_labels": x_labels,
+        }
+        # 靜態片段已預先編碼，只需編碼動態欄位後一次串接
+        statics, fields = _chart_fragments(width, height)
+        parts = [statics[0]]
+        for field, static in zip(fields, statics[1:]):
+            parts.append(values[field].encode("utf-8"))
+            parts.append(static)
+        return b"".join(parts)
 
 
 def get_currency_service() -> CurrencyService:
@@ -288,27 +466,38 @@ def get_currency_service() -> CurrencyService:
 
 # ============ Discord UI ============
 
+# 貨幣清單不會變動，下拉選項與選單欄位只在載入時建立一次
+_STATIC_SELECT_OPTIONS: List[discord.SelectOption] = [
+    discord.SelectOption(
+        label=f"{info['name']} ({code})",
+        value=code,
+        emoji=info['emoji'],
+        description=f"查詢 {info['full_name']} 匯率",
+    )
+    for currencies in CURRENCY_GROUPS.values()
+    for code, info in currencies.items()
+]
+
+_STATIC_MENU_FIELDS: List[Tuple[str, str]] = [
+    (
+        f"📋 {group_name}",
+        " · ".join(f"{info['emoji']} {info['name']}" for info in currencies.values()),
+    )
+    for group_name, currencies in CURRENCY_GROUPS.items()
+]
+
+
 class CurrencySelect(discord.ui.Select):
     """貨幣下拉選單"""
     
     def __init__(self, parent_view: "CurrencyMenuView") -> None:
         self.parent_view = parent_view
         
-        options = []
-        for group_name, currencies in CURRENCY_GROUPS.items():
-            for code, info in currencies.items():
-                options.append(discord.SelectOption(
-                    label=f"{info['name']} ({code})",
-                    value=code,
-                    emoji=info['emoji'],
-                    description=f"查詢 {info['full_name']} 匯率",
-                ))
-        
         super().__init__(
             placeholder="🔍 選擇要查詢的貨幣...",
             min_values=1,
             max_values=1,
-            options=options,
+            options=list(_STATIC_SELECT_OPTIONS),
             row=0,
         )
     
@@ -363,13 +552,8 @@ class CurrencyMenuView(discord.ui.View):
         )
         
         # 分組顯示貨幣
-        for group_name, currencies in CURRENCY_GROUPS.items():
-            currencies_list = [f"{info['emoji']} {info['name']}" for code, info in currencies.items()]
-            embed.add_field(
-                name=f"📋 {group_name}",
-                value=" · ".join(currencies_list),
-                inline=False,
-            )
+        for name, value in _STATIC_MENU_FIELDS:
+            embed.add_field(name=name, value=value, inline=False)
         
         embed.set_footer(text="💡 使用下拉選單選擇貨幣 · 以新台幣 (TWD) 為基準")
         return embed
@@ -408,9 +592,9 @@ class CurrencyMenuView(discord.ui.View):
             
             # 計算漲跌
             change_pct = 0.0
-            if history and len(history) >= 2:
-                first_rate = history[0][1]
-                last_rate = history[-1][1]
+            if history is not None:
+                first_rate = history.rates[0]
+                last_rate = history.rates[-1]
                 change = last_rate - first_rate
                 change_pct = (change / first_rate) * 100 if first_rate else 0
                 
@@ -488,9 +672,12 @@ class CurrencyMenuView(discord.ui.View):
             # 生成走勢圖
             files: List[discord.File] = []
             embeds: List[discord.Embed] = [embed]
-            if history:
-                history_chart = self.service.generate_line_chart(history, f"{info['name']} 近 90 天走勢")
+            if history is not None:
+                history_chart = await self.service.get_or_build_chart(currency, history, f"{info['name']} 近 90 天走勢")
                 if history_chart:
+                    # discord.File 會把 bytes 當成檔案路徑，需包成 BytesIO；
+                    # BytesIO 對不可變的 bytes 採寫入時複製，快取的圖表不會被複製。
+                    # 每次上傳後 File 會關閉串流，故不共用 BytesIO 物件。
                     history_file = discord.File(io.BytesIO(history_chart), filename="history_chart.svg")
                     files.append(history_file)
                     embed.set_image(url="attachment://history_chart.svg")
@@ -517,11 +704,11 @@ class CurrencyMenuView(discord.ui.View):
 
 # ============ 指令註冊 ============
 
-def setup_currency_feature(bot: discord.Client) -> None:
-    """註冊匯率查詢指令"""
+class CurrencyCog(commands.Cog):
+    """匯率查詢指令；卸載時（含 bot.close）關閉 HTTP 連線"""
     
-    @bot.tree.command(name="money", description="💱 查詢即時匯率與走勢圖")
-    async def money_command(interaction: discord.Interaction) -> None:
+    @app_commands.command(name="money", description="💱 查詢即時匯率與走勢圖")
+    async def money_command(self, interaction: discord.Interaction) -> None:
         view = CurrencyMenuView(owner_id=interaction.user.id)
         embed = view._build_menu_embed()
         await interaction.response.send_message(embed=embed, view=view)
@@ -530,13 +717,38 @@ def setup_currency_feature(bot: discord.Client) -> None:
         msg = await interaction.original_response()
         view.message = msg
     
-    # 關閉時清理資源
-    original_close = getattr(bot, '_original_close_for_currency', None) or bot.close
+    def __init__(self) -> None:
+        self._prewarmed = False
     
-    async def close_with_currency() -> None:
-        await get_currency_service().close()
-        await original_close()
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        # on_ready 在斷線重連後也會觸發，只預熱一次
+        if self._prewarmed:
+            return
+        self._prewarmed = True
+        await self._prewarm()
+    
+    async def _prewarm(self) -> None:
+        """啟動時預先查詢所有貨幣匯率，讓使用者第一次查詢就命中快取"""
+        service = get_currency_service()
+        semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+        
+        async def warm(currency: str) -> None:
+            async with semaphore:
+                await service.get_current_rate(currency)
+        
+        started = time.monotonic()
+        results = await asyncio.gather(*(warm(code) for code in CURRENCIES), return_exceptions=True)
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        log.info(
+            "Currency cache prewarmed: %d/%d in %.2fs",
+            len(results) - failed, len(results), time.monotonic() - started,
+        )
     
-    if not hasattr(bot, '_original_close_for_currency'):
-        bot._original_close_for_currency = bot.close
-        bot.close = close_with_currency
+    async def cog_unload(self) -> None:
+        await get_currency_service().close()
+
+
+async def setup_currency_feature(bot: commands.Bot) -> None:
+    """註冊匯率查詢指令"""
+    await bot.add_cog(CurrencyCog())
@@ -1,9 +1,10 @@
-"""晚餐抽獎系統：分類按鈕 + 隨機菜單"""
+"""晚餐抽獎系統：分類選單 + 隨機菜單"""
 from __future__ import annotations
 
 import asyncio
 import random
-from typing import Optional
+import weakref
+from typing import Awaitable, Callable, Dict, Final, NamedTuple, Optional, Set, Tuple
 
 import discord
 
@@ -14,40 +15,191 @@ from .food_data import (
     SIDE_OPTIONS,
 )
 
-# 抽獎動畫 emoji
-LOTTERY_EMOJIS = ["🎰", "🎲", "🎯", "🎪", "✨", "🌟", "💫", "🔮"]
+# 非發起者操作選單時的提示
+_UNAUTHORIZED_MSG: Final[str] = "🍽️ 只有發起抽獎的人能操作這組選單，請自行輸入 `/dinner` 開始你的晚餐抽獎！"
+
+# 每個頻道同時進行的訊息編輯上限（Discord 每頻道約 5 次 / 5 秒）
+EDIT_CONCURRENCY = 4
+# 弱參照：頻道沒有進行中的編輯時 Semaphore 即被回收，不會隨頻道數無限成長
+_EDIT_SEMAPHORES: "weakref.WeakValueDictionary[int, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+
+def _edit_semaphore(channel_id: int) -> asyncio.Semaphore:
+    """取得頻道的編輯 Semaphore，只在沒有時才建立"""
+    semaphore = _EDIT_SEMAPHORES.get(channel_id)
+    if semaphore is None:
+        semaphore = _EDIT_SEMAPHORES[channel_id] = asyncio.Semaphore(EDIT_CONCURRENCY)
+    return semaphore
+
+# 模組專用亂數產生器，綁定為模組變數省去 random 模組屬性查找
+_rng = random.Random()
 
 # 食物相關 emoji
-FOOD_EMOJIS = {
-    "rice": ["🍚", "🍛", "🍱", "🥢"],
-    "noodle": ["🍜", "🍝", "🥡", "🥢"],
-    "snack": ["🍢", "🍡", "🥟", "🧆"],
-    "hotpot": ["🍲", "🫕", "🥘", "♨️"],
-    "korean": ["🇰🇷", "🥬", "🌶️", "🥢"],
-    "japanese": ["🇯🇵", "🍣", "🍙", "🥢"],
-    "hongkong": ["🇭🇰", "🥡", "🫖", "🥢"],
+FOOD_EMOJIS: Dict[str, Tuple[str, ...]] = {
+    "rice": ("🍚", "🍛", "🍱", "🥢"),
+    "noodle": ("🍜", "🍝", "🥡", "🥢"),
+    "snack": ("🍢", "🍡", "🥟", "🧆"),
+    "hotpot": ("🍲", "🫕", "🥘", "♨️"),
+    "korean": ("🇰🇷", "🥬", "🌶️", "🥢"),
+    "japanese": ("🇯🇵", "🍣", "🍙", "🥢"),
+    "hongkong": ("🇭🇰", "🥡", "🫖", "🥢"),
 }
 
 # 飲料推薦
-DRINK_OPTIONS = {
-    "rice": ["🧋 珍珠奶茶", "🍵 無糖綠茶", "🥤 冬瓜茶", "🧃 檸檬紅茶"],
-    "noodle": ["🍵 烏龍茶", "🥤 酸梅湯", "🧋 多多綠茶", "🍺 啤酒"],
-    "snack": ["🧋 珍珠鮮奶", "🥤 可樂", "🍺 台啤", "🧃 蘋果汁"],
-    "hotpot": ["🥤 可樂", "🍺 啤酒", "🧃 王老吉", "🍵 烏龍茶"],
-    "korean": ["🍺 韓國燒酒", "🥤 可樂", "🧃 水蜜桃汁", "🍵 玄米茶"],
-    "japanese": ["🍺 日本啤酒", "🍵 抹茶", "🧃 可爾必思", "🍶 清酒"],
-    "hongkong": ["🧋 港式奶茶", "☕ 鴛鴦", "🍋 凍檸茶", "🥤 楊枝甘露"],
+DRINK_OPTIONS: Dict[str, Tuple[str, ...]] = {
+    "rice": ("🧋 珍珠奶茶", "🍵 無糖綠茶", "🥤 冬瓜茶", "🧃 檸檬紅茶"),
+    "noodle": ("🍵 烏龍茶", "🥤 酸梅湯", "🧋 多多綠茶", "🍺 啤酒"),
+    "snack": ("🧋 珍珠鮮奶", "🥤 可樂", "🍺 台啤", "🧃 蘋果汁"),
+    "hotpot": ("🥤 可樂", "🍺 啤酒", "🧃 王老吉", "🍵 烏龍茶"),
+    "korean": ("🍺 韓國燒酒", "🥤 可樂", "🧃 水蜜桃汁", "🍵 玄米茶"),
+    "japanese": ("🍺 日本啤酒", "🍵 抹茶", "🧃 可爾必思", "🍶 清酒"),
+    "hongkong": ("🧋 港式奶茶", "☕ 鴛鴦", "🍋 凍檸茶", "🥤 楊枝甘露"),
+}
+
+# 載入時補齊缺少的類別，之後一律直接索引
+for _key in ALL_CATEGORY_KEYS:
+    FOOD_EMOJIS.setdefault(_key, ("🍽️",))
+    DRINK_OPTIONS.setdefault(_key, ("🧋 珍珠奶茶",))
+del _key
+
+
+# 每類 emoji / 飲料固定 4 項，抽選時以 getrandbits 直接取索引
+_POOL_SIZE = 4
+_POOL_BITS = 2
+
+
+def _pool(items: Tuple[str, ...]) -> Tuple[str, ...]:
+    """補齊為 _POOL_SIZE 項的 tuple，讓位元索引不會越界"""
+    if not items or len(items) > _POOL_SIZE:
+        raise ValueError(f"抽選池需為 1~{_POOL_SIZE} 項：{items!r}")
+    return tuple(items[i % len(items)] for i in range(_POOL_SIZE))
+
+
+class _ResultTemplate(NamedTuple):
+    """抽獎結果中每個類別固定不變的部分"""
+    color: discord.Color
+    category_label: str
+    food_emojis: Tuple[str, ...]
+    drinks: Tuple[str, ...]
+
+
+# 結果 Embed 的類別固定欄位在載入時建立一次，抽獎時只需一次查表
+_RESULT_TEMPLATES: Dict[str, _ResultTemplate] = {
+    key: _ResultTemplate(
+        color=info["color"],  # type: ignore[arg-type]
+        category_label=f"{info['emoji']} {info['name']}",
+        food_emojis=_pool(FOOD_EMOJIS[key]),
+        drinks=_pool(DRINK_OPTIONS[key]),
+    )
+    for key, info in DINNER_CATEGORIES.items()
 }
 
 
 def draw_food(category_key: Optional[str] = None) -> tuple[str, str]:
     """根據指定類別（或隨機類別）抽一項食物"""
-    key = category_key or random.choice(ALL_CATEGORY_KEYS)
+    key = category_key or _rng.choice(ALL_CATEGORY_KEYS)
     data = DINNER_CATEGORIES[key]
-    food = random.choice(data["foods"])  # type: ignore[index]
+    food = _rng.choice(data["foods"])  # type: ignore[index]
     return key, food
 
 
+def _retry_after(exc: discord.HTTPException) -> float:
+    """從 429 回應取得建議等待秒數"""
+    try:
+        return float(exc.response.headers.get("Retry-After", 1.0))
+    except (AttributeError, TypeError, ValueError):
+        return 1.0
+
+
+# 429 重試次數與退避參數
+EDIT_RETRIES = 3
+_BACKOFF_BASE = 0.5
+_BACKOFF_JITTER = 0.25
+
+
+async def _edit_with_backoff(edit: Callable[[], Awaitable[object]], retries: int = EDIT_RETRIES) -> None:
+    """執行訊息編輯，遇 429 依 Retry-After 與指數退避加隨機抖動重試"""
+    for attempt in range(retries + 1):
+        try:
+            await edit()
+            return
+        except discord.HTTPException as exc:
+            # 30046：舊訊息編輯次數已達上限，重試也不會成功
+            if exc.status != 429 or exc.code == 30046 or attempt == retries:
+                raise
+            delay = max(_retry_after(exc), _BACKOFF_BASE * 2 ** attempt)
+            await asyncio.sleep(delay + _rng.random() * _BACKOFF_JITTER)
+
+
+# 與 ALL_CATEGORY_KEYS 對齊的類別顯示文字
+_CATEGORY_LABELS: Tuple[str, ...] = tuple(
+    f"{info['emoji']} **{info['name']}** ({len(info['foods'])}道)"  # type: ignore[arg-type]
+    for info in (DINNER_CATEGORIES[key] for key in ALL_CATEGORY_KEYS)
+)
+
+
+def _construct_menu_embed() -> discord.Embed:
+    """建立晚餐選單 Embed（載入時執行一次）"""
+    embed = discord.Embed(
+        title="🍽️ 今晚吃什麼？",
+        description=(
+            "選擇一個料理類型，讓命運決定今晚的晚餐！\n\n"
+            "━━━━━━━━━━━━━━━━━━━━━━\n"
+            "🎰 **抽獎規則**\n"
+            "• 選擇喜歡的料理類型\n"
+            "• 系統隨機抽出一道美食\n"
+            "• 可重複抽獎直到滿意\n"
+            "━━━━━━━━━━━━━━━━━━━━━━"
+        ),
+        color=discord.Color.from_rgb(251, 146, 60),
+    )
+    
+    # 分組顯示類別
+    embed.add_field(
+        name="📋 可選類型",
+        value="\n".join(_CATEGORY_LABELS[:4]),
+        inline=True,
+    )
+    embed.add_field(
+        name="​",
+        value="\n".join(_CATEGORY_LABELS[4:]),
+        inline=True,
+    )
+    
+    embed.add_field(
+        name="🎲 隨便來",
+        value="不知道吃什麼？讓命運來決定！",
+        inline=False,
+    )
+    
+    embed.set_footer(text="⏰ 選單 3 分鐘後失效 · 祝你用餐愉快！")
+    return embed
+
+
+_MENU_EMBED = _construct_menu_embed()
+
+# 「隨便來」選項的值（不對應任何類別）
+RANDOM_OPTION_VALUE = "random"
+
+# 料理類型下拉選項：以單一 Select 取代每個類別各一個按鈕
+_CATEGORY_OPTIONS = [
+    discord.SelectOption(
+        label=str(DINNER_CATEGORIES[key]["name"]),
+        value=key,
+        emoji=str(DINNER_CATEGORIES[key]["emoji"]),
+        description=f"{len(DINNER_CATEGORIES[key]['foods'])} 道料理隨機抽",  # type: ignore[arg-type]
+    )
+    for key in ALL_CATEGORY_KEYS
+] + [
+    discord.SelectOption(
+        label="隨便來",
+        value=RANDOM_OPTION_VALUE,
+        emoji="🎲",
+        description="不知道吃什麼？讓命運來決定！",
+    )
+]
+
+
 class DinnerLotteryView(discord.ui.View):
     """互動式按鈕選單"""
 
@@ -57,183 +209,74 @@ class DinnerLotteryView(discord.ui.View):
         self.message = message
 
     async def on_timeout(self) -> None:
-        for item in self.children:
-            if isinstance(item, discord.ui.Button):
-                item.disabled = True
+        # 直接移除元件，不必逐一停用再序列化整個 View
         if self.message:
+            message = self.message
             try:
-                await self.message.edit(view=self)
+                await _edit_with_backoff(lambda: message.edit(view=None))
             except discord.HTTPException:
                 pass
+        self.stop()
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.owner_id:
-            await interaction.response.send_message(
-                "🍽️ 只有發起抽獎的人能操作這組按鈕，請自行輸入 `/dinner` 開始你的晚餐抽獎！",
-                ephemeral=True,
-            )
+            await interaction.response.send_message(_UNAUTHORIZED_MSG, ephemeral=True)
             return False
         return True
 
-    def _build_menu_embed(self) -> discord.Embed:
-        embed = discord.Embed(
-            title="🍽️ 今晚吃什麼？",
-            description=(
-                "選擇一個料理類型，讓命運決定今晚的晚餐！\n\n"
-                "━━━━━━━━━━━━━━━━━━━━━━\n"
-                "🎰 **抽獎規則**\n"
-                "• 選擇喜歡的料理類型\n"
-                "• 系統隨機抽出一道美食\n"
-                "• 可重複抽獎直到滿意\n"
-                "━━━━━━━━━━━━━━━━━━━━━━"
-            ),
-            color=discord.Color.from_rgb(251, 146, 60),
-        )
-        
-        # 分組顯示類別
-        category_info = []
-        for key in ALL_CATEGORY_KEYS:
-            info = DINNER_CATEGORIES[key]
-            category_info.append(f"{info['emoji']} **{info['name']}** ({len(info['foods'])}道)")
-        
-        embed.add_field(
-            name="📋 可選類型",
-            value="\n".join(category_info[:4]),
-            inline=True,
-        )
-        embed.add_field(
-            name="​",
-            value="\n".join(category_info[4:]),
-            inline=True,
-        )
-        
-        embed.add_field(
-            name="🎲 隨便來",
-            value="不知道吃什麼？讓命運來決定！",
-            inline=False,
-        )
-        
-        embed.set_footer(text="⏰ 選單 3 分鐘後失效 · 祝你用餐愉快！")
-        return embed
-
-    def _build_result_embed(self, category_key: str, food: str) -> discord.Embed:
-        info = DINNER_CATEGORIES[category_key]
-        tip = random.choice(DINNER_TIPS)
-        side = random.choice(SIDE_OPTIONS)
-        drink = random.choice(DRINK_OPTIONS.get(category_key, ["🧋 珍珠奶茶"]))
-        food_emoji = random.choice(FOOD_EMOJIS.get(category_key, ["🍽️"]))
+    @staticmethod
+    def _build_menu_embed() -> discord.Embed:
+        # 選單內容固定，回傳共用的 Embed（唯讀，請勿修改）
+        return _MENU_EMBED
+
+    @staticmethod
+    def _build_result_embed(category_key: str, food: str) -> discord.Embed:
+        template = _RESULT_TEMPLATES[category_key]
+        tip = _rng.choice(DINNER_TIPS)
+        side = _rng.choice(SIDE_OPTIONS)
+        drink = template.drinks[_rng.getrandbits(_POOL_BITS)]
+        food_emoji = template.food_emojis[_rng.getrandbits(_POOL_BITS)]
         
-        embed = discord.Embed(
-            title=f"🎉 晚餐抽獎結果",
-            description=(
+        # 一次組好 Embed 結構再建立，省去逐一 add_field
+        return discord.Embed.from_dict({
+            "title": "🎉 晚餐抽獎結果",
+            "description": (
                 f"━━━━━━━━━━━━━━━━━━━━━━\n"
                 f"　　　　{food_emoji} **{food}** {food_emoji}\n"
                 f"━━━━━━━━━━━━━━━━━━━━━━"
             ),
-            color=info['color'],
-        )
-        
-        # 類型標籤
-        embed.add_field(
-            name="📌 料理類型",
-            value=f"{info['emoji']} {info['name']}",
-            inline=True,
-        )
-        
-        # 推薦飲料
-        embed.add_field(
-            name="🥤 推薦飲料",
-            value=drink,
-            inline=True,
-        )
-        
-        # 搭配推薦
-        embed.add_field(
-            name="🍴 加點推薦",
-            value=side,
-            inline=True,
-        )
-        
-        # 用餐小提示
-        embed.add_field(
-            name="💡 用餐小提示",
-            value=f"```{tip}```",
-            inline=False,
-        )
-        
-        # 評分區（純裝飾）
-        stars = "⭐" * random.randint(4, 5)
-        embed.add_field(
-            name="✨ 今日運勢",
-            value=f"{stars} 這是個好選擇！",
-            inline=False,
-        )
-        
-        embed.set_footer(text="🔄 不滿意？再按一次按鈕重新抽獎！")
-        return embed
-
-    def _build_loading_embed(self) -> discord.Embed:
-        """建立抽獎中的過渡 Embed"""
-        emoji = random.choice(LOTTERY_EMOJIS)
-        embed = discord.Embed(
-            title=f"{emoji} 抽獎中...",
-            description="🎰 命運的齒輪正在轉動...\n\n`[████████░░░░░░░░░░░░]` 40%",
-            color=discord.Color.from_rgb(251, 191, 36),
-        )
-        return embed
+            "color": template.color.value,
+            "fields": [
+                # 類型標籤
+                {"name": "📌 料理類型", "value": template.category_label, "inline": True},
+                # 推薦飲料
+                {"name": "🥤 推薦飲料", "value": drink, "inline": True},
+                # 搭配推薦
+                {"name": "🍴 加點推薦", "value": side, "inline": True},
+                # 用餐小提示
+                {"name": "💡 用餐小提示", "value": f"```{tip}```", "inline": False},
+                # 評分區（純裝飾）
+                {"name": "✨ 今日運勢", "value": f"{'⭐' * _rng.randint(4, 5)} 這是個好選擇！", "inline": False},
+            ],
+            "footer": {"text": "🔄 不滿意？從選單再選一次重新抽獎！"},
+        })
 
     async def _handle_draw(self, interaction: discord.Interaction, category_key: Optional[str]) -> None:
-        # 先顯示抽獎動畫
-        loading_embed = self._build_loading_embed()
-        await interaction.response.edit_message(embed=loading_embed, view=self)
-        
-        # 短暫延遲增加期待感
-        await asyncio.sleep(0.8)
-        
-        # 更新進度
-        loading_embed.description = "🎰 命運的齒輪正在轉動...\n\n`[████████████████░░░░]` 80%"
-        await interaction.edit_original_response(embed=loading_embed)
-        
-        await asyncio.sleep(0.5)
-        
-        # 顯示結果
+        # 直接一次編輯顯示結果，避免多次 PATCH 觸發頻道編輯速率限制
         key, food = draw_food(category_key)
         embed = self._build_result_embed(key, food)
-        await interaction.edit_original_response(embed=embed, view=self)
-
-    @discord.ui.button(label="🍚 飯類", style=discord.ButtonStyle.primary, row=0)
-    async def rice_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "rice")
-
-    @discord.ui.button(label="🍜 麵類", style=discord.ButtonStyle.primary, row=0)
-    async def noodle_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "noodle")
-
-    @discord.ui.button(label="🍢 小吃", style=discord.ButtonStyle.primary, row=0)
-    async def snack_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "snack")
-
-    @discord.ui.button(label="🍲 鍋物", style=discord.ButtonStyle.primary, row=0)
-    async def hotpot_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "hotpot")
+        # 先確認互動，排隊與 429 重試才不會拖過 3 秒回應期限（defer 後 15 分鐘內可編輯原訊息）
+        await interaction.response.defer()
+        # 同頻道的後續編輯在本地排隊，先於 Discord 回 429 之前自行限流
+        async with _edit_semaphore(interaction.channel_id or 0):
+            await _edit_with_backoff(lambda: interaction.edit_original_response(embed=embed, view=self))
 
-    @discord.ui.button(label="🇰🇷 韓式", style=discord.ButtonStyle.secondary, row=1)
-    async def korean_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "korean")
+    @discord.ui.select(placeholder="🍽️ 選擇料理類型開始抽獎...", options=_CATEGORY_OPTIONS, row=0)
+    async def category_select(self, interaction: discord.Interaction, select: discord.ui.Select) -> None:
+        value = select.values[0]
+        await self._handle_draw(interaction, None if value == RANDOM_OPTION_VALUE else value)
 
-    @discord.ui.button(label="🇯🇵 日式", style=discord.ButtonStyle.secondary, row=1)
-    async def japanese_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "japanese")
-
-    @discord.ui.button(label="🇭🇰 港式", style=discord.ButtonStyle.secondary, row=1)
-    async def hongkong_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, "hongkong")
-
-    @discord.ui.button(label="🎲 隨便來", style=discord.ButtonStyle.success, row=2)
-    async def random_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        await self._handle_draw(interaction, None)
-    
-    @discord.ui.button(label="📋 重新選擇", style=discord.ButtonStyle.secondary, row=2)
+    @discord.ui.button(label="📋 重新選擇", style=discord.ButtonStyle.secondary, row=1)
     async def reset_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         embed = self._build_menu_embed()
         await interaction.response.edit_message(embed=embed, view=self)
@@ -241,11 +284,24 @@ class DinnerLotteryView(discord.ui.View):
 
 # --- 對外註冊 ---
 
+# 保留背景工作參照，避免尚未完成就被回收
+_BACKGROUND_TASKS: Set["asyncio.Task[None]"] = set()
+
+
+async def _bind_message(view: DinnerLotteryView, interaction: discord.Interaction) -> None:
+    try:
+        view.message = await interaction.original_response()
+    except discord.HTTPException:
+        pass
+
+
 def setup_dinner_feature(bot: discord.Client) -> None:
     @bot.tree.command(name="dinner", description="抽一份今晚要吃什麼")
     async def dinner_command(interaction: discord.Interaction) -> None:
         view = DinnerLotteryView(owner_id=interaction.user.id)
         embed = view._build_menu_embed()
         await interaction.response.send_message(embed=embed, view=view)
-        message = await interaction.original_response()
-        view.message = message
+        # 取得訊息物件只供逾時移除選單使用，改於背景進行不拖延指令
+        task = asyncio.create_task(_bind_message(view, interaction))
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
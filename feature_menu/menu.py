@@ -1,19 +1,49 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, Final, List, Optional, Sequence, Tuple
 
 import discord
 
-from currency_feature.currency import CurrencyMenuView, CurrencySelect, CURRENCY_GROUPS
+from currency_feature.currency import CurrencyMenuView
 from dinner_feature.dinner import DinnerLotteryView
 from voice_tracker.voice_tracking import VoiceTrackingService, humanize_duration
-from weather_feature.weather import get_weather_service, _build_weather_embed, TAIWAN_CITIES, WeatherError
+from weather_feature.weather import get_weather_service, _build_weather_embed, WeatherError
+
+log = logging.getLogger(__name__)
 
 MENTION_TARGET_ID = 1375818369344864317
 
+# 語音排行榜快取秒數
+LEADERBOARD_CACHE_TTL = 15
+# 同一伺服器語音時數同步的最短間隔（秒）
+SESSION_SYNC_INTERVAL = 2.0
+# 排行榜與天氣查詢的同時執行上限
+SLOW_OP_CONCURRENCY = 4
+# Embed 欄位內容上限為 1024 字，保留一些餘裕
+FIELD_VALUE_LIMIT = 1000
+
+# escape_markdown 可能處理的字元（含標題、清單、引用、連結語法的起始字元）
+_MARKDOWN_CHARS = frozenset("\\*_~|`>#[-")
+
+# 非請求人操作選單時的提示
+_NOT_OWNER_MSG = "❌ 只有清單請求人可以操作這個選單，請自行 tag 機器人開啟新選單。"
+
+# 縣市按鈕 custom_id 前綴
+CITY_BUTTON_PREFIX = "weather_city:"
+
 # 獎牌 emoji
 MEDAL_EMOJIS = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
 
+# 名次標籤預先建好，超出範圍才臨時產生
+MEDAL_LABEL_COUNT = 100
+MEDAL_LABELS: Tuple[str, ...] = tuple(MEDAL_EMOJIS) + tuple(
+    f"`{idx + 1}.`" for idx in range(len(MEDAL_EMOJIS), MEDAL_LABEL_COUNT)
+)
+
 VOICE_BUCKET_META = {
     "weekly": ("📆 本週語音排行", "統計週期：週一 00:00 至今", "🗓️"),
     "monthly": ("📅 本月語音排行", "統計週期：本月 1 日 00:00 至今", "📆"),
@@ -21,124 +51,280 @@ VOICE_BUCKET_META = {
     "alltime": ("🏆 累積語音排行", "自機器人啟用以來的總計", "👑"),
 }
 
-def generate_progress_bar(value: int, max_value: int, length: int = 10) -> str:
-    """生成進度條"""
-    if max_value <= 0:
-        return "░" * length
-    ratio = min(value / max_value, 1.0)
-    filled = int(ratio * length)
-    return "█" * filled + "░" * (length - filled)
+
+# 功能選單只有歡迎詞因人而異
+_FUNCTION_MENU_DESC = (
+    "歡迎 <@{requester_id}>！請選擇想使用的功能 👇\n\n"
+    "━━━━━━━━━━━━━━━━━━━━━━"
+)
+
+
+def _construct_function_menu_template() -> discord.Embed:
+    """建立功能選單 Embed 樣板（description 於每次使用時填入）"""
+    embed = discord.Embed(
+        title="🎛️ 和風牌監視器 – 功能中心",
+        color=discord.Color.from_rgb(88, 101, 242),
+    )
+    embed.add_field(
+        name="🎙️ 語音時數",
+        value="查看伺服器成員語音活躍排行榜",
+        inline=True,
+    )
+    embed.add_field(
+        name="💱 匯率看板",
+        value="查詢即時匯率與 90 天走勢圖",
+        inline=True,
+    )
+    embed.add_field(
+        name="🍽️ 晚餐抽獎",
+        value="讓命運決定今晚吃什麼",
+        inline=True,
+    )
+    embed.add_field(
+        name="🌤️ 天氣預報",
+        value="查詢臺灣各縣市即時天氣",
+        inline=True,
+    )
+    embed.set_footer(text="⏰ 選單 2 分鐘後自動失效")
+    return embed
+
+
+def _construct_voice_menu_embed() -> discord.Embed:
+    """建立語音選單 Embed（載入時執行一次）"""
+    embed = discord.Embed(
+        title="🎙️ 語音時數排行",
+        description=(
+            "選擇想查看的排行榜類別\n\n"
+            "━━━━━━━━━━━━━━━━━━━━━━"
+        ),
+        color=discord.Color.from_rgb(59, 165, 93),
+    )
+    embed.add_field(
+        name="📆 周榜",
+        value="本週一開始至今",
+        inline=True,
+    )
+    embed.add_field(
+        name="📅 月榜",
+        value="本月 1 日開始至今",
+        inline=True,
+    )
+    embed.add_field(
+        name="📊 年榜",
+        value="今年 1/1 開始至今",
+        inline=True,
+    )
+    embed.add_field(
+        name="🏆 總排行",
+        value="累積所有時數",
+        inline=True,
+    )
+    embed.set_footer(text="點擊按鈕查看對應排行榜")
+    return embed
+
+
+# 各地區縣市（按鈕順序）
+REGION_CITIES: Final[Dict[str, Tuple[str, Tuple[str, ...]]]] = {
+    "north": ("北部", ("臺北市", "新北市", "基隆市", "桃園市", "新竹市", "新竹縣", "宜蘭縣")),
+    "central": ("中部", ("臺中市", "苗栗縣", "彰化縣", "南投縣", "雲林縣")),
+    "south": ("南部", ("臺南市", "高雄市", "嘉義市", "嘉義縣", "屏東縣")),
+    "east": ("東部及離島", ("花蓮縣", "臺東縣", "澎湖縣", "金門縣", "連江縣")),
+}
+
+
+def _construct_weather_menu_embed() -> discord.Embed:
+    """建立天氣選單 Embed（載入時執行一次）"""
+    embed = discord.Embed(
+        title="🌤️ 天氣預報選單",
+        description="選擇想查詢的縣市，即可查看即時天氣與未來 24 小時預報。",
+        color=discord.Color.blue(),
+    )
+    # 分類顯示縣市（與地區按鈕共用同一份縣市表）
+    for key, icon in (("north", "🏙️"), ("central", "🏞️"), ("south", "🌴"), ("east", "🏝️")):
+        region, cities = REGION_CITIES[key]
+        embed.add_field(name=f"{icon} {region}", value="、".join(cities), inline=False)
+    embed.set_footer(text="使用下拉選單選擇縣市，或返回功能清單")
+    return embed
+
+
+def _build_city_embed(region: str, cities: Tuple[str, ...]) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"🌤️ 天氣預報 - {region}",
+        description=(
+            "選擇要查詢的縣市\n\n"
+            "━━━━━━━━━━━━━━━━━━━━━━"
+        ),
+        color=discord.Color.blue(),
+    )
+    embed.add_field(
+        name="📍 可選縣市",
+        value=" · ".join(cities),
+        inline=False,
+    )
+    embed.set_footer(text="點擊縣市按鈕查看天氣預報")
+    return embed
+
+
+_FUNCTION_MENU_TEMPLATE = _construct_function_menu_template()
+_VOICE_MENU_EMBED = _construct_voice_menu_embed()
+_WEATHER_MENU_EMBED = _construct_weather_menu_embed()
+# 地區縣市選單內容固定，共用的 Embed 唯讀，請勿修改
+REGION_EMBEDS: Dict[str, discord.Embed] = {
+    key: _build_city_embed(region, cities) for key, (region, cities) in REGION_CITIES.items()
+}
+
+
+def _chunk_lines(lines: List[str], limit: int = FIELD_VALUE_LIMIT) -> List[str]:
+    """將多行文字依序打包成每段不超過 limit 字的區塊"""
+    blocks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in lines:
+        # 加上換行字元的長度
+        extra = len(line) + (1 if current else 0)
+        if current and size + extra > limit:
+            blocks.append("\n".join(current))
+            current, size = [], 0
+            extra = len(line)
+        current.append(line)
+        size += extra
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def _render_leaderboard_embed(
+    title: str,
+    hint: str,
+    rows: List[Tuple[int, int]],
+    names: Dict[int, str],
+) -> discord.Embed:
+    """依排行資料產生語音排行榜 Embed（純函式，不存取 Discord 物件）"""
+    embed = discord.Embed(
+        title=title,
+        description=f"{hint}\n━━━━━━━━━━━━━━━━━━━━━━",
+        color=discord.Color.from_rgb(59, 165, 93),
+    )
+    
+    if rows:
+        # 迴圈內常用的函式先綁成區域變數，總時數一併累加
+        escape = discord.utils.escape_markdown
+        total_seconds = 0
+        lines = []
+        for idx, (user_id, seconds) in enumerate(rows):
+            total_seconds += seconds
+            name = names[user_id]
+            # 名稱不含 Markdown 字元時不必跑 escape_markdown 的正規表示式
+            display = name if _MARKDOWN_CHARS.isdisjoint(name) else escape(name)
+            medal = MEDAL_LABELS[idx] if idx < MEDAL_LABEL_COUNT else f"`{idx+1}.`"
+            lines.append(f"{medal} **{display}**\n　　{humanize_duration(seconds)}")
+        
+        # 單一欄位上限 1024 字，名單較長時分成多個欄位
+        for i, block in enumerate(_chunk_lines(lines)):
+            embed.add_field(
+                name=f"🏅 排行榜 ({i + 1})" if i else "🏅 排行榜",
+                value=block,
+                inline=False,
+            )
+        
+        # 統計摘要
+        embed.add_field(
+            name="📊 統計摘要",
+            value=(
+                f"👥 上榜人數：**{len(rows)}** 人\n"
+                f"⏱️ 總計時數：**{humanize_duration(total_seconds)}**\n"
+                f"📈 平均時數：**{humanize_duration(total_seconds // len(rows))}**"
+            ),
+            inline=False,
+        )
+    else:
+        embed.add_field(
+            name="🏅 排行榜",
+            value="📭 目前沒有任何資料\n快來語音頻道聊天吧！",
+            inline=False,
+        )
+    
+    embed.set_footer(text="🔄 點擊其他按鈕切換排行榜類型")
+    return embed
+
+
+async def _safe_edit(interaction: discord.Interaction, **kwargs: Any) -> None:
+    """以 edit_message 直接回應互動；互動已過期（10062）時略過不報錯"""
+    try:
+        await interaction.response.edit_message(**kwargs)
+    except discord.NotFound as exc:
+        if exc.code != 10062:
+            raise
+        log.debug("Interaction %s expired before the menu could be updated", interaction.id)
+
 
 def setup_menu_feature(bot: discord.Client) -> None:
-    FeatureMenuController(bot)
+    controller = FeatureMenuController(bot)
+
+    @bot.tree.command(name="menu", description="開啟功能選單")
+    async def menu_command(interaction: discord.Interaction) -> None:
+        owner_id = interaction.user.id
+        embed, view = controller.make_function_menu(owner_id)
+        await interaction.response.send_message(embed=embed, view=view)
+        view.message = await interaction.original_response()
 
 
 class FeatureMenuController:
     def __init__(self, bot: discord.Client) -> None:
         self.bot = bot
+        # (guild_id, bucket) -> (建立時間, 排行榜 Embed)，共用的 Embed 唯讀
+        self._leaderboard_cache: Dict[Tuple[int, str], Tuple[float, discord.Embed]] = {}
+        # 限制同時進行的資料庫 / 外部 API 查詢，避免大量點擊時拖垮事件迴圈
+        self.slow_ops = asyncio.Semaphore(SLOW_OP_CONCURRENCY)
+        # 每個伺服器的語音時數同步鎖與上次同步時間
+        self._sync_locks: DefaultDict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._last_sync: Dict[int, float] = {}
         bot.add_listener(self._on_message, name="on_message")
 
     async def _on_message(self, message: discord.Message) -> None:
-        if message.author.bot:
+        # 絕大多數訊息沒有提及任何人，先以最便宜的檢查排除
+        if not message.mentions or message.author.bot:
             return
         if not self._should_trigger(message):
             return
 
         owner_id = message.author.id
-        embed = self._build_function_menu_embed(owner_id)
-        view = FunctionMenuView(self, owner_id=owner_id)
+        embed, view = self.make_function_menu(owner_id)
         sent = await message.channel.send(embed=embed, view=view)
         view.message = sent
 
     def _should_trigger(self, message: discord.Message) -> bool:
         if message.guild is None:
             return False
-        if self.bot.user and self.bot.user.id in {m.id for m in message.mentions}:
-            return True
-        return any(m.id == MENTION_TARGET_ID for m in message.mentions)
+        # 單次掃描提及清單，找到即返回，不另建集合
+        bot_user = self.bot.user
+        bot_id = bot_user.id if bot_user else None
+        for m in message.mentions:
+            mid = m.id
+            if mid == bot_id or mid == MENTION_TARGET_ID:
+                return True
+        return False
+
+    def make_function_menu(
+        self,
+        owner_id: int,
+        message: Optional[discord.Message] = None,
+    ) -> Tuple[discord.Embed, FunctionMenuView]:
+        """建立功能選單的 Embed 與 View（開啟選單與各頁返回共用）"""
+        return self._build_function_menu_embed(owner_id), FunctionMenuView(self, owner_id=owner_id, message=message)
 
     def _build_function_menu_embed(self, requester_id: int) -> discord.Embed:
-        embed = discord.Embed(
-            title="🎛️ 和風牌監視器 – 功能中心",
-            description=(
-                f"歡迎 <@{requester_id}>！請選擇想使用的功能 👇\n\n"
-                "━━━━━━━━━━━━━━━━━━━━━━"
-            ),
-            color=discord.Color.from_rgb(88, 101, 242),
-        )
-        embed.add_field(
-            name="🎙️ 語音時數",
-            value="查看伺服器成員語音活躍排行榜",
-            inline=True,
-        )
-        embed.add_field(
-            name="💱 匯率看板",
-            value="查詢即時匯率與 90 天走勢圖",
-            inline=True,
-        )
-        embed.add_field(
-            name="🍽️ 晚餐抽獎",
-            value="讓命運決定今晚吃什麼",
-            inline=True,
-        )
-        embed.add_field(
-            name="🌤️ 天氣預報",
-            value="查詢臺灣各縣市即時天氣",
-            inline=True,
-        )
-        embed.set_footer(text="⏰ 選單 2 分鐘後自動失效")
+        embed = _FUNCTION_MENU_TEMPLATE.copy()
+        embed.description = _FUNCTION_MENU_DESC.format(requester_id=requester_id)
         return embed
 
     def _build_voice_menu_embed(self) -> discord.Embed:
-        embed = discord.Embed(
-            title="🎙️ 語音時數排行",
-            description=(
-                "選擇想查看的排行榜類別\n\n"
-                "━━━━━━━━━━━━━━━━━━━━━━"
-            ),
-            color=discord.Color.from_rgb(59, 165, 93),
-        )
-        embed.add_field(
-            name="📆 周榜",
-            value="本週一開始至今",
-            inline=True,
-        )
-        embed.add_field(
-            name="📅 月榜",
-            value="本月 1 日開始至今",
-            inline=True,
-        )
-        embed.add_field(
-            name="📊 年榜",
-            value="今年 1/1 開始至今",
-            inline=True,
-        )
-        embed.add_field(
-            name="🏆 總排行",
-            value="累積所有時數",
-            inline=True,
-        )
-        embed.set_footer(text="點擊按鈕查看對應排行榜")
-        return embed
+        # 選單內容固定，回傳共用的 Embed（唯讀，請勿修改）
+        return _VOICE_MENU_EMBED
 
     def _build_weather_menu_embed(self) -> discord.Embed:
-        embed = discord.Embed(
-            title="🌤️ 天氣預報選單",
-            description="選擇想查詢的縣市，即可查看即時天氣與未來 24 小時預報。",
-            color=discord.Color.blue(),
-        )
-        # 分類顯示縣市
-        north = "臺北市、新北市、基隆市、桃園市、新竹市、新竹縣、宜蘭縣"
-        central = "臺中市、苗栗縣、彰化縣、南投縣、雲林縣"
-        south = "臺南市、高雄市、嘉義市、嘉義縣、屏東縣"
-        east_islands = "花蓮縣、臺東縣、澎湖縣、金門縣、連江縣"
-        
-        embed.add_field(name="🏙️ 北部", value=north, inline=False)
-        embed.add_field(name="🏞️ 中部", value=central, inline=False)
-        embed.add_field(name="🌴 南部", value=south, inline=False)
-        embed.add_field(name="🏝️ 東部及離島", value=east_islands, inline=False)
-        embed.set_footer(text="使用下拉選單選擇縣市，或返回功能清單")
-        return embed
+        # 選單內容固定，回傳共用的 Embed（唯讀，請勿修改）
+        return _WEATHER_MENU_EMBED
 
     async def build_voice_leaderboard_embed(
         self,
@@ -151,60 +337,36 @@ class FeatureMenuController:
         if service is None:
             return self._build_error_embed("語音統計服務尚未就緒。")
 
-        await service.sync_active_sessions(guild.id)
-        rows = await service.fetch_leaderboard(guild.id, bucket)
+        # 短時間內切換排行榜時直接沿用剛產生的結果
+        cache_key = (guild.id, bucket)
+        cached = self._leaderboard_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < LEADERBOARD_CACHE_TTL:
+            return cached[1]
+
+        async with self.slow_ops:
+            await self._sync_guild_sessions(service, guild.id)
+            rows = await service.fetch_leaderboard(guild.id, bucket)
         title, hint, icon = VOICE_BUCKET_META.get(bucket, ("語音排行榜", "", "📊"))
-        
-        embed = discord.Embed(
-            title=title,
-            description=f"{hint}\n━━━━━━━━━━━━━━━━━━━━━━",
-            color=discord.Color.from_rgb(59, 165, 93),
-        )
-        
-        if rows:
-            # 計算總時數
-            total_seconds = sum(seconds for _, seconds in rows)
-            
-            lines = []
-            for idx, (user_id, seconds) in enumerate(rows, start=0):
-                member = guild.get_member(user_id)
-                display = member.display_name if member else f"User {user_id}"
-                display = discord.utils.escape_markdown(display)
-                
-                # 獎牌 emoji
-                medal = MEDAL_EMOJIS[idx] if idx < len(MEDAL_EMOJIS) else f"`{idx+1}.`"
-                
-                # 格式化時間
-                time_str = humanize_duration(seconds)
-                
-                lines.append(f"{medal} **{display}**\n　　{time_str}")
-            
-            embed.add_field(
-                name="🏅 排行榜",
-                value="\n".join(lines),
-                inline=False,
-            )
-            
-            # 統計摘要
-            embed.add_field(
-                name="📊 統計摘要",
-                value=(
-                    f"👥 上榜人數：**{len(rows)}** 人\n"
-                    f"⏱️ 總計時數：**{humanize_duration(total_seconds)}**\n"
-                    f"📈 平均時數：**{humanize_duration(total_seconds // len(rows) if rows else 0)}**"
-                ),
-                inline=False,
-            )
-        else:
-            embed.add_field(
-                name="🏅 排行榜",
-                value="📭 目前沒有任何資料\n快來語音頻道聊天吧！",
-                inline=False,
-            )
-        
-        embed.set_footer(text="🔄 點擊其他按鈕切換排行榜類型")
+
+        # 先取出顯示名稱，Embed 產生只依賴純資料
+        get_member = guild.get_member
+        names: Dict[int, str] = {}
+        for user_id, _ in rows:
+            member = get_member(user_id)
+            names[user_id] = member.display_name if member else f"User {user_id}"
+
+        embed = _render_leaderboard_embed(title, hint, rows, names)
+        self._leaderboard_cache[cache_key] = (time.monotonic(), embed)
         return embed
 
+    async def _sync_guild_sessions(self, service: VoiceTrackingService, guild_id: int) -> None:
+        """同步進行中的語音時數；同一伺服器短時間內的重複請求共用上一次結果"""
+        async with self._sync_locks[guild_id]:
+            if time.monotonic() - self._last_sync.get(guild_id, 0.0) < SESSION_SYNC_INTERVAL:
+                return
+            await service.sync_active_sessions(guild_id)
+            self._last_sync[guild_id] = time.monotonic()
+
     def _build_error_embed(self, message: str) -> discord.Embed:
         return discord.Embed(
             title="⚠️ 無法完成操作",
@@ -213,7 +375,8 @@ class FeatureMenuController:
         )
 
 
-class FunctionMenuView(discord.ui.View):
+class _OwnerBoundView(discord.ui.View):
+    """功能選單各頁共用：只允許請求人操作，逾時停用按鈕"""
     def __init__(self, controller: FeatureMenuController, owner_id: int, message: Optional[discord.Message] = None) -> None:
         super().__init__(timeout=120)
         self.controller = controller
@@ -226,127 +389,88 @@ class FunctionMenuView(discord.ui.View):
         if self.message:
             try:
                 await self.message.edit(view=self)
-            except discord.HTTPException:
+            except (discord.NotFound, discord.Forbidden):
+                # 訊息已刪除或無權限編輯，屬正常情況
                 pass
+            except discord.HTTPException as exc:
+                log.warning("Failed to disable expired menu %s: %s", self.message.id, exc)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.owner_id:
-            await interaction.response.send_message("❌ 只有清單請求人可以操作這個選單，請自行 tag 機器人開啟新選單。", ephemeral=True)
+            await interaction.response.send_message(_NOT_OWNER_MSG, ephemeral=True)
             return False
         return True
 
+
+class FunctionMenuView(_OwnerBoundView):
     @discord.ui.button(label="🎙️ 語音時數", style=discord.ButtonStyle.primary, row=0)
     async def voice_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         embed = self.controller._build_voice_menu_embed()
-        new_view = VoiceMenuView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
+        new_view = VoiceMenuView(self.controller, owner_id=self.owner_id, message=self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
 
     @discord.ui.button(label="💱 匯率看板", style=discord.ButtonStyle.primary, row=0)
     async def currency_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        view = CurrencyMenuWrapper(self.controller, owner_id=self.owner_id, message=interaction.message)
+        view = CurrencyMenuWrapper(self.controller, owner_id=self.owner_id, message=self.message or interaction.message)
         embed = view._build_menu_embed()
-        await interaction.response.edit_message(embed=embed, view=view)
+        await _safe_edit(interaction, embed=embed, view=view)
 
     @discord.ui.button(label="🍽️ 晚餐抽獎", style=discord.ButtonStyle.success, row=0)
     async def dinner_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        view = DinnerMenuWrapper(self.controller, owner_id=self.owner_id, message=interaction.message)
+        view = DinnerMenuWrapper(self.controller, owner_id=self.owner_id, message=self.message or interaction.message)
         embed = view._build_menu_embed()
-        await interaction.response.edit_message(embed=embed, view=view)
+        await _safe_edit(interaction, embed=embed, view=view)
 
     @discord.ui.button(label="🌤️ 天氣預報", style=discord.ButtonStyle.success, row=0)
     async def weather_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         embed = self.controller._build_weather_menu_embed()
-        view = WeatherRegionView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=view)
+        view = WeatherRegionView(self.controller, owner_id=self.owner_id, message=self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=view)
 
 
-class WeatherRegionView(discord.ui.View):
+class WeatherRegionView(_OwnerBoundView):
     """天氣選單 - 選擇地區"""
-    def __init__(self, controller: FeatureMenuController, owner_id: int, message: Optional[discord.Message] = None) -> None:
-        super().__init__(timeout=120)
-        self.controller = controller
-        self.owner_id = owner_id
-        self.message = message
-
-    async def on_timeout(self) -> None:
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except discord.HTTPException:
-                pass
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.owner_id:
-            await interaction.response.send_message("❌ 只有清單請求人可以操作這個選單，請自行 tag 機器人開啟新選單。", ephemeral=True)
-            return False
-        return True
+    async def _show_region(self, interaction: discord.Interaction, region_key: str) -> None:
+        _, cities = REGION_CITIES[region_key]
+        view = WeatherCityView(self.controller, self.owner_id, cities, self.message)
+        await _safe_edit(interaction, embed=REGION_EMBEDS[region_key], view=view)
 
     @discord.ui.button(label="🏙️ 北部", style=discord.ButtonStyle.primary, row=0)
     async def north(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        cities = ["臺北市", "新北市", "基隆市", "桃園市", "新竹市", "新竹縣", "宜蘭縣"]
-        embed = self._build_city_embed("北部", cities)
-        view = WeatherCityView(self.controller, self.owner_id, cities, self.message)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await self._show_region(interaction, "north")
 
     @discord.ui.button(label="🏞️ 中部", style=discord.ButtonStyle.primary, row=0)
     async def central(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        cities = ["臺中市", "苗栗縣", "彰化縣", "南投縣", "雲林縣"]
-        embed = self._build_city_embed("中部", cities)
-        view = WeatherCityView(self.controller, self.owner_id, cities, self.message)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await self._show_region(interaction, "central")
 
     @discord.ui.button(label="🌴 南部", style=discord.ButtonStyle.primary, row=0)
     async def south(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        cities = ["臺南市", "高雄市", "嘉義市", "嘉義縣", "屏東縣"]
-        embed = self._build_city_embed("南部", cities)
-        view = WeatherCityView(self.controller, self.owner_id, cities, self.message)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await self._show_region(interaction, "south")
 
     @discord.ui.button(label="🏝️ 東部離島", style=discord.ButtonStyle.primary, row=0)
     async def east(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        cities = ["花蓮縣", "臺東縣", "澎湖縣", "金門縣", "連江縣"]
-        embed = self._build_city_embed("東部及離島", cities)
-        view = WeatherCityView(self.controller, self.owner_id, cities, self.message)
-        await interaction.response.edit_message(embed=embed, view=view)
+        await self._show_region(interaction, "east")
 
     @discord.ui.button(label="⬅️ 返回", style=discord.ButtonStyle.danger, row=1)
     async def go_back(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        embed = self.controller._build_function_menu_embed(self.owner_id)
-        new_view = FunctionMenuView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
-
-    def _build_city_embed(self, region: str, cities: list[str]) -> discord.Embed:
-        embed = discord.Embed(
-            title=f"🌤️ 天氣預報 - {region}",
-            description=(
-                "選擇要查詢的縣市\n\n"
-                "━━━━━━━━━━━━━━━━━━━━━━"
-            ),
-            color=discord.Color.blue(),
-        )
-        embed.add_field(
-            name="📍 可選縣市",
-            value=" · ".join(cities),
-            inline=False,
-        )
-        embed.set_footer(text="點擊縣市按鈕查看天氣預報")
-        return embed
+        embed, new_view = self.controller.make_function_menu(self.owner_id, self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
 
 
-class WeatherCityView(discord.ui.View):
+class WeatherCityView(_OwnerBoundView):
     """天氣選單 - 選擇縣市"""
-    def __init__(self, controller: FeatureMenuController, owner_id: int, cities: list[str], message: Optional[discord.Message] = None) -> None:
-        super().__init__(timeout=120)
-        self.controller = controller
-        self.owner_id = owner_id
-        self.message = message
+    def __init__(self, controller: FeatureMenuController, owner_id: int, cities: Sequence[str], message: Optional[discord.Message] = None) -> None:
+        super().__init__(controller, owner_id, message)
         
         # 動態新增縣市按鈕
         for idx, city in enumerate(cities):
-            btn = discord.ui.Button(label=city, style=discord.ButtonStyle.success, row=idx // 4)
-            btn.callback = self._make_callback(city)
+            btn = discord.ui.Button(
+                label=city,
+                style=discord.ButtonStyle.success,
+                row=idx // 4,
+                custom_id=f"{CITY_BUTTON_PREFIX}{city}",
+            )
+            btn.callback = self._on_city_click
             self.add_item(btn)
         
         # 返回按鈕（放在最後一排）
@@ -355,30 +479,15 @@ class WeatherCityView(discord.ui.View):
         back_btn.callback = self._go_back
         self.add_item(back_btn)
 
-    def _make_callback(self, city: str):
-        async def callback(interaction: discord.Interaction):
-            await self.show_weather(interaction, city)
-        return callback
+    async def _on_city_click(self, interaction: discord.Interaction) -> None:
+        # 所有縣市按鈕共用同一個回呼，由 custom_id 取得縣市名稱
+        city = interaction.data["custom_id"][len(CITY_BUTTON_PREFIX):]  # type: ignore[index]
+        await self.show_weather(interaction, city)
 
     async def _go_back(self, interaction: discord.Interaction) -> None:
         embed = self.controller._build_weather_menu_embed()
-        new_view = WeatherRegionView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
-
-    async def on_timeout(self) -> None:
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except discord.HTTPException:
-                pass
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.owner_id:
-            await interaction.response.send_message("❌ 只有清單請求人可以操作這個選單，請自行 tag 機器人開啟新選單。", ephemeral=True)
-            return False
-        return True
+        new_view = WeatherRegionView(self.controller, owner_id=self.owner_id, message=self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
 
     async def show_weather(self, interaction: discord.Interaction, city: str) -> None:
         """查詢並顯示天氣"""
@@ -386,7 +495,8 @@ class WeatherCityView(discord.ui.View):
         
         try:
             service = get_weather_service()
-            report = await service.fetch_weather(city)
+            async with self.controller.slow_ops:
+                report = await service.fetch_weather(city)
             embed = _build_weather_embed(report)
         except WeatherError as e:
             embed = self.controller._build_error_embed(str(e))
@@ -397,70 +507,29 @@ class WeatherCityView(discord.ui.View):
         await interaction.followup.edit_message(interaction.message.id, embed=embed, view=new_view)
 
 
-class WeatherResultView(discord.ui.View):
+class WeatherResultView(_OwnerBoundView):
     """天氣結果 View，只有返回按鈕"""
-    def __init__(self, controller: FeatureMenuController, owner_id: int, message: Optional[discord.Message] = None) -> None:
-        super().__init__(timeout=120)
-        self.controller = controller
-        self.owner_id = owner_id
-        self.message = message
-
-    async def on_timeout(self) -> None:
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except discord.HTTPException:
-                pass
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.owner_id:
-            await interaction.response.send_message("❌ 只有清單請求人可以操作這個選單，請自行 tag 機器人開啟新選單。", ephemeral=True)
-            return False
-        return True
-
     @discord.ui.button(label="🔄 重新選擇", style=discord.ButtonStyle.primary, row=0)
     async def select_again(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         embed = self.controller._build_weather_menu_embed()
-        new_view = WeatherRegionView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
+        new_view = WeatherRegionView(self.controller, owner_id=self.owner_id, message=self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
 
     @discord.ui.button(label="⬅️ 返回主選單", style=discord.ButtonStyle.danger, row=0)
     async def go_back(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        embed = self.controller._build_function_menu_embed(self.owner_id)
-        new_view = FunctionMenuView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
+        embed, new_view = self.controller.make_function_menu(self.owner_id, self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
 
 
-class VoiceMenuView(discord.ui.View):
-    def __init__(self, controller: FeatureMenuController, owner_id: int, message: Optional[discord.Message] = None) -> None:
-        super().__init__(timeout=120)
-        self.controller = controller
-        self.owner_id = owner_id
-        self.message = message
-
-    async def on_timeout(self) -> None:
-        for item in self.children:
-            item.disabled = True
-        if self.message:
-            try:
-                await self.message.edit(view=self)
-            except discord.HTTPException:
-                pass
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.owner_id:
-            await interaction.response.send_message("❌ 只有清單請求人可以操作這個選單，請自行 tag 機器人開啟新選單。", ephemeral=True)
-            return False
-        return True
-
+class VoiceMenuView(_OwnerBoundView):
     async def _show_bucket(self, interaction: discord.Interaction, bucket: str) -> None:
+        # 排行榜需查詢資料庫，先回應互動以免超過 3 秒期限
+        await interaction.response.defer()
         try:
             embed = await self.controller.build_voice_leaderboard_embed(interaction.guild, bucket)
         except Exception as e:
             embed = self.controller._build_error_embed(f"發生錯誤：{e}")
-        await interaction.response.edit_message(embed=embed, view=self)
+        await interaction.edit_original_response(embed=embed, view=self)
 
     @discord.ui.button(label="📆 周榜", style=discord.ButtonStyle.primary, row=0)
     async def weekly(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
@@ -480,9 +549,8 @@ class VoiceMenuView(discord.ui.View):
 
     @discord.ui.button(label="⬅️ 返回", style=discord.ButtonStyle.danger, row=1)
     async def go_back(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        embed = self.controller._build_function_menu_embed(self.owner_id)
-        new_view = FunctionMenuView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
+        embed, new_view = self.controller.make_function_menu(self.owner_id, self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
 
 
 
@@ -493,9 +561,8 @@ class CurrencyMenuWrapper(CurrencyMenuView):
 
     @discord.ui.button(label="⬅️ 返回主選單", style=discord.ButtonStyle.danger, row=2)
     async def go_back(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        embed = self.controller._build_function_menu_embed(self.owner_id)
-        new_view = FunctionMenuView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, attachments=[], view=new_view)
+        embed, new_view = self.controller.make_function_menu(self.owner_id, self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, attachments=[], view=new_view)
 
 
 class DinnerMenuWrapper(DinnerLotteryView):
@@ -505,6 +572,5 @@ class DinnerMenuWrapper(DinnerLotteryView):
 
     @discord.ui.button(label="⬅️ 返回主選單", style=discord.ButtonStyle.danger, row=3)
     async def go_back(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        embed = self.controller._build_function_menu_embed(self.owner_id)
-        new_view = FunctionMenuView(self.controller, owner_id=self.owner_id, message=interaction.message)
-        await interaction.response.edit_message(embed=embed, view=new_view)
+        embed, new_view = self.controller.make_function_menu(self.owner_id, self.message or interaction.message)
+        await _safe_edit(interaction, embed=embed, view=new_view)
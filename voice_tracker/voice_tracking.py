@@ -3,10 +3,13 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import time
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
+from itertools import cycle
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import aiosqlite
 import discord
@@ -22,6 +25,119 @@ log = logging.getLogger(__name__)
 
 BUCKETS = ("weekly", "monthly", "yearly", "alltime")
 
+# 排行榜查詢用的唯讀連線數；WAL 模式下讀取不會被寫入連線的交易擋住
+READER_CONNECTIONS = 4
+
+# voice_time 每位成員一列，各統計區間各佔一個欄位（欄位名稱即 BUCKETS）
+_VOICE_TIME_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS voice_time (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        """ + "".join(f"{bucket} INTEGER NOT NULL DEFAULT 0,\n        " for bucket in BUCKETS) + """updated_at TEXT NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+    )
+"""
+
+_INSERT_VOICE_TIME_SQL = "INSERT INTO voice_time (guild_id, user_id, " + ", ".join(BUCKETS) + ", updated_at) "
+_ADD_ON_CONFLICT_SQL = (
+    " ON CONFLICT(guild_id, user_id) DO UPDATE SET "
+    + ", ".join(f"{bucket} = voice_time.{bucket} + excluded.{bucket}" for bucket in BUCKETS)
+    + ", updated_at = excluded.updated_at"
+)
+
+# 一次將同一段時數加到所有區間
+_UPSERT_DURATION_SQL = (
+    _INSERT_VOICE_TIME_SQL + "VALUES (?, ?, " + ", ".join("?" * len(BUCKETS)) + ", ?)" + _ADD_ON_CONFLICT_SQL
+)
+
+# 進行中的時段直接在 SQL 內結算到現在：整批加進 voice_time，再把起點推進到 :now
+_SYNC_SESSIONS_SQL = (
+    _INSERT_VOICE_TIME_SQL
+    + "SELECT guild_id, user_id, "
+    + ", ".join(":now - started_at" for _ in BUCKETS)
+    + ", :now_iso FROM active_sessions WHERE started_at < :now"
+)
+_SYNC_ALL_SESSIONS_SQL = _SYNC_SESSIONS_SQL + _ADD_ON_CONFLICT_SQL
+_SYNC_GUILD_SESSIONS_SQL = _SYNC_SESSIONS_SQL + " AND guild_id = :guild_id" + _ADD_ON_CONFLICT_SQL
+_ADVANCE_ALL_SESSIONS_SQL = "UPDATE active_sessions SET started_at = :now WHERE started_at < :now"
+_ADVANCE_GUILD_SESSIONS_SQL = _ADVANCE_ALL_SESSIONS_SQL + " AND guild_id = :guild_id"
+
+# 各區間的排行與名次查詢；欄位名稱來自 BUCKETS，不接受外部字串
+_LEADERBOARD_SQL = {
+    bucket: f"""
+        SELECT user_id, {bucket} FROM voice_time
+        WHERE guild_id = ? AND {bucket} > 0
+        ORDER BY {bucket} DESC
+        LIMIT ?
+    """
+    for bucket in BUCKETS
+}
+
+_USER_POSITION_SQL = {
+    bucket: f"""
+        SELECT {bucket},
+               (
+                   SELECT COUNT(*) + 1
+                   FROM voice_time vt2
+                   WHERE vt2.guild_id = voice_time.guild_id
+                     AND vt2.{bucket} > 0
+                     AND vt2.{bucket} > voice_time.{bucket}
+               ) AS rank
+        FROM voice_time
+        WHERE guild_id = ? AND user_id = ? AND {bucket} > 0
+    """
+    for bucket in BUCKETS
+}
+
+# 舊版每區間一列的資料表轉成每成員一列
+_MIGRATE_BUCKET_ROWS_SQL = (
+    "INSERT INTO voice_time (guild_id, user_id, " + ", ".join(BUCKETS) + ", updated_at) "
+    "SELECT guild_id, user_id, "
+    + ", ".join(f"SUM(CASE bucket WHEN '{bucket}' THEN seconds ELSE 0 END)" for bucket in BUCKETS)
+    + ", MAX(updated_at) FROM voice_time_legacy GROUP BY guild_id, user_id"
+)
+
+# started_at 為 UTC epoch 秒數，時長直接以整數相減
+_ACTIVE_SESSIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS active_sessions (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        channel_id INTEGER NOT NULL,
+        started_at INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+    )
+"""
+
+_INSERT_SESSION_SQL = """
+    INSERT INTO active_sessions (guild_id, user_id, channel_id, started_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(guild_id, user_id) DO NOTHING
+"""
+
+_DELETE_SESSION_SQL = "DELETE FROM active_sessions WHERE guild_id = ? AND user_id = ?"
+
+# 其餘固定的 SQL 也集中在此，避免每次呼叫重新組字串；同一段文字才能命中 sqlite3 的敘述快取
+_SELECT_ALL_SESSIONS_SQL = "SELECT guild_id, user_id, channel_id, started_at FROM active_sessions"
+_SELECT_SESSION_START_SQL = "SELECT started_at FROM active_sessions WHERE guild_id = ? AND user_id = ?"
+_MOVE_SESSION_SQL = "UPDATE active_sessions SET channel_id = ?, started_at = ? WHERE guild_id = ? AND user_id = ?"
+_DELETE_GUILD_STATS_SQL = "DELETE FROM voice_time WHERE guild_id = ?"
+_DELETE_GUILD_SESSIONS_SQL = "DELETE FROM active_sessions WHERE guild_id = ?"
+_RESET_BUCKET_SQL = {bucket: f"UPDATE voice_time SET {bucket} = 0 WHERE {bucket} > 0" for bucket in BUCKETS}
+_GET_METADATA_SQL = "SELECT value FROM metadata WHERE key = ?"
+_SELECT_RESET_MARKERS_SQL = (
+    "SELECT key, value FROM metadata WHERE key IN ('weekly_reset', 'monthly_reset', 'yearly_reset')"
+)
+_SET_METADATA_SQL = """
+    INSERT INTO metadata (key, value)
+    VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+
+
+def _duration_params(guild_id: int, user_id: int, duration: int, timestamp: str) -> Tuple[object, ...]:
+    """Build the _UPSERT_DURATION_SQL parameters adding one duration to every bucket."""
+    return (guild_id, user_id, *(duration,) * len(BUCKETS), timestamp)
+
 
 @dataclass
 class BotConfig:
@@ -53,11 +169,21 @@ def _parse_int(value: Optional[str]) -> Optional[int]:
         return None
 
 
-def humanize_duration(seconds: int) -> str:
-    seconds = max(0, int(seconds))
-    hours, remainder = divmod(seconds, 3600)
+@lru_cache(maxsize=3600)
+def _format_sub_hour(remainder: int) -> str:
     minutes, secs = divmod(remainder, 60)
-    return f"{hours:02d}小時 {minutes:02d}分鐘 {secs:02d}秒"
+    return f"{minutes:02d}分鐘 {secs:02d}秒"
+
+
+@lru_cache(maxsize=1)
+def _iso_timestamp(epoch_seconds: int) -> str:
+    # 同一秒內的事件共用同一個 ISO 字串，只在秒數改變時重新格式化
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).isoformat()
+
+
+def humanize_duration(seconds: int) -> str:
+    hours, remainder = divmod(max(0, int(seconds)), 3600)
+    return f"{hours:02d}小時 {_format_sub_hour(remainder)}"
 
 
 def load_config() -> BotConfig:
@@ -88,102 +214,180 @@ class VoiceTrackingService:
         self.leaderboard_limit = config.leaderboard_limit
         self.db: Optional[aiosqlite.Connection] = None
         self.db_lock = asyncio.Lock()
+        # 唯讀連線各有自己的工作執行緒，/time 查詢不必排在語音事件的寫入後面
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_cycle: Optional[Iterator[aiosqlite.Connection]] = None
+        # 已結束但尚未寫入 voice_time 的時數：(guild_id, user_id) -> (累計秒數, 最後結束時間)
+        self._pending: Dict[Tuple[int, int], Tuple[int, str]] = {}
+        # active_sessions 的列數，為 0 時每分鐘的同步不必查詢資料庫
+        self._active_count = 0
 
     async def connect(self) -> None:
         self.db = await aiosqlite.connect(self.db_path)
         self.db.row_factory = aiosqlite.Row
         await self.db.execute("PRAGMA journal_mode = WAL;")
+        # WAL 模式下 NORMAL 只在檢查點時 fsync；斷電最多遺失最後幾筆已提交的交易，資料庫不會損毀
+        await self.db.execute("PRAGMA synchronous = NORMAL;")
+        await self.db.execute("PRAGMA temp_store = MEMORY;")
+        await self.db.execute("PRAGMA cache_size = -64000;")  # 約 64 MB 頁面快取
+        await self.db.execute("PRAGMA mmap_size = 268435456;")  # 256 MB
+        await self.db.execute("PRAGMA wal_autocheckpoint = 1000;")
+        await self.db.execute("PRAGMA busy_timeout = 5000;")
         await self.db.execute("PRAGMA foreign_keys = ON;")
+        # PRAGMA optimize 每個索引最多抽樣 400 列，避免大表上的 ANALYZE 拖慢關機與重置
+        await self.db.execute("PRAGMA analysis_limit = 400;")
         await self._initialize_schema()
+        self._active_count = (await self.db.execute_fetchall("SELECT COUNT(*) FROM active_sessions"))[0][0]
+        # 從未收集過統計資訊時先 ANALYZE 一次，讓查詢規劃器選對索引
+        if not await self.db.execute_fetchall(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ):
+            await self.db.execute("ANALYZE voice_time;")
+            await self.db.commit()
+
+        # 結構與 WAL 檔都由寫入連線建立完成後，才開唯讀連線
+        reader_uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        for _ in range(READER_CONNECTIONS):
+            reader = await aiosqlite.connect(reader_uri, uri=True)
+            reader.row_factory = aiosqlite.Row
+            await reader.execute("PRAGMA busy_timeout = 5000;")
+            await reader.execute("PRAGMA mmap_size = 268435456;")
+            self._readers.append(reader)
+        self._reader_cycle = cycle(self._readers)
+
+    def _reader(self) -> aiosqlite.Connection:
+        """Return the next read-only connection, falling back to the writer."""
+        if self._reader_cycle is None:
+            assert self.db is not None
+            return self.db
+        return next(self._reader_cycle)
 
     async def close(self) -> None:
+        for reader in self._readers:
+            await reader.close()
+        self._readers.clear()
+        self._reader_cycle = None
         if self.db:
+            await self.flush_pending()
+            await self.db.execute("PRAGMA optimize;")
             await self.db.close()
             self.db = None
 
     async def _initialize_schema(self) -> None:
         assert self.db is not None
+        columns = {row[1] for row in await self.db.execute_fetchall("PRAGMA table_info(voice_time)")}
+        if "bucket" in columns:
+            await self._migrate_bucket_rows()
+        session_columns = await self.db.execute_fetchall("PRAGMA table_info(active_sessions)")
+        if any(row[1] == "started_at" and row[2].upper() == "TEXT" for row in session_columns):
+            await self._migrate_session_timestamps()
+
         await self.db.executescript(
+            _VOICE_TIME_TABLE_SQL
+            + ";\n"
+            + "".join(
+                # 各區間的排行榜覆蓋索引，只收錄有時數的成員
+                f"""
+            CREATE INDEX IF NOT EXISTS idx_voice_time_{bucket}
+                ON voice_time (guild_id, {bucket} DESC, user_id)
+                WHERE {bucket} > 0;
             """
-            CREATE TABLE IF NOT EXISTS voice_time (
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                bucket TEXT NOT NULL,
-                seconds INTEGER NOT NULL DEFAULT 0,
-                updated_at TEXT NOT NULL,
-                PRIMARY KEY (guild_id, user_id, bucket)
-            );
-
-            CREATE TABLE IF NOT EXISTS active_sessions (
-                guild_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                channel_id INTEGER NOT NULL,
-                started_at TEXT NOT NULL,
-                PRIMARY KEY (guild_id, user_id)
-            );
+                for bucket in BUCKETS
+            )
+            + _ACTIVE_SESSIONS_TABLE_SQL
+            + """;
 
             CREATE TABLE IF NOT EXISTS metadata (
                 key TEXT PRIMARY KEY,
                 value TEXT NOT NULL
             );
 
-            CREATE INDEX IF NOT EXISTS idx_voice_time_guild_bucket_seconds
-                ON voice_time (guild_id, bucket, seconds DESC);
-
-            CREATE INDEX IF NOT EXISTS idx_voice_time_guild_user
-                ON voice_time (guild_id, user_id);
-
             CREATE INDEX IF NOT EXISTS idx_active_sessions_guild_user
                 ON active_sessions (guild_id, user_id);
             """
         )
         await self.db.commit()
 
+    async def _migrate_bucket_rows(self) -> None:
+        """Convert the old one-row-per-bucket voice_time table to one row per member."""
+        assert self.db is not None
+        log.info("Migrating voice_time to one row per member")
+        await self.db.executescript(
+            "BEGIN;\n"
+            "ALTER TABLE voice_time RENAME TO voice_time_legacy;\n"
+            + _VOICE_TIME_TABLE_SQL + ";\n"
+            + _MIGRATE_BUCKET_ROWS_SQL + ";\n"
+            "DROP TABLE voice_time_legacy;\n"
+            "COMMIT;"
+        )
+
+    async def _migrate_session_timestamps(self) -> None:
+        """Convert active_sessions.started_at from ISO-8601 text to epoch seconds."""
+        assert self.db is not None
+        log.info("Migrating active_sessions.started_at to epoch seconds")
+        await self.db.executescript(
+            "BEGIN;\n"
+            "ALTER TABLE active_sessions RENAME TO active_sessions_legacy;\n"
+            + _ACTIVE_SESSIONS_TABLE_SQL + ";\n"
+            "INSERT INTO active_sessions (guild_id, user_id, channel_id, started_at) "
+            "SELECT guild_id, user_id, channel_id, CAST(strftime('%s', started_at) AS INTEGER) "
+            "FROM active_sessions_legacy;\n"
+            "DROP TABLE active_sessions_legacy;\n"
+            "COMMIT;"
+        )
+
     async def reconcile_active_sessions(self, client: discord.Client) -> None:
         assert self.db is not None
-        now = datetime.now(timezone.utc)
+        now_ts = int(time.time())
         async with self.db_lock:
-            cursor = await self.db.execute(
-                "SELECT guild_id, user_id, channel_id, started_at FROM active_sessions"
-            )
-            rows = await cursor.fetchall()
+            rows = await self.db.execute_fetchall(_SELECT_ALL_SESSIONS_SQL)
 
-        recorded_map: Dict[Tuple[int, int], Tuple[int, datetime]] = {
-            (row[0], row[1]): (row[2], datetime.fromisoformat(row[3])) for row in rows
+        recorded_map: Dict[Tuple[int, int], Tuple[int, int]] = {
+            (row[0], row[1]): (row[2], row[3]) for row in rows
         }
 
-        live_voice: Dict[Tuple[int, int], int] = {}
-        for guild in client.guilds:
-            channels = list(guild.voice_channels) + list(getattr(guild, "stage_channels", []))
-            for channel in channels:
-                for member in channel.members:
-                    if member.bot:
-                        continue
-                    live_voice[(guild.id, member.id)] = channel.id
-
-        finalize_ops: List[Tuple[int, int, datetime]] = []
-        start_ops: List[Tuple[int, int, int]] = []
-
-        for pair, (channel_id, started_at) in recorded_map.items():
-            live_channel = live_voice.get(pair)
-            if live_channel == channel_id:
-                continue
-            finalize_ops.append((pair[0], pair[1], started_at))
-            if live_channel is not None:
-                start_ops.append((pair[0], pair[1], live_channel))
-
-        for pair, live_channel in live_voice.items():
-            if pair not in recorded_map:
-                start_ops.append((pair[0], pair[1], live_channel))
+        live_voice: Dict[Tuple[int, int], int] = {
+            (guild.id, member.id): channel.id
+            for guild in client.guilds
+            for channel in (*guild.voice_channels, *getattr(guild, "stage_channels", ()))
+            for member in channel.members
+            if not member.bot
+        }
+
+        # 已記錄但頻道不同（或已離開）者需結算；其中仍在語音中的要以新頻道重新開始
+        changed = [pair for pair, (channel_id, _) in recorded_map.items() if live_voice.get(pair) != channel_id]
+        finalize_ops: List[Tuple[int, int, int]] = [
+            (pair[0], pair[1], recorded_map[pair][1]) for pair in changed
+        ]
+        start_ops: List[Tuple[int, int, int]] = [
+            (pair[0], pair[1], live_voice[pair]) for pair in changed if pair in live_voice
+        ]
+        start_ops += [
+            (pair[0], pair[1], live_voice[pair]) for pair in live_voice.keys() - recorded_map.keys()
+        ]
 
         if not finalize_ops and not start_ops:
             return
 
+        # 所有結算、刪除與新增各以一次 executemany 送出，並在同一個交易內提交
+        now_iso = _iso_timestamp(now_ts)
+        duration_rows: List[Tuple[object, ...]] = []
+        for guild_id, user_id, started_ts in finalize_ops:
+            duration = now_ts - started_ts
+            if duration > 0:
+                duration_rows.append(_duration_params(guild_id, user_id, duration, now_iso))
+        delete_keys = [(guild_id, user_id) for guild_id, user_id, _ in finalize_ops]
+        start_rows = [(guild_id, user_id, channel_id, now_ts) for guild_id, user_id, channel_id in start_ops]
+
         async with self.db_lock:
-            for guild_id, user_id, started_at in finalize_ops:
-                await self._finalize_session_locked(guild_id, user_id, started_at, now)
-            for guild_id, user_id, channel_id in start_ops:
-                await self._start_session_locked(guild_id, user_id, channel_id)
+            if duration_rows:
+                await self.db.executemany(_UPSERT_DURATION_SQL, duration_rows)
+            if delete_keys:
+                cursor = await self.db.executemany(_DELETE_SESSION_SQL, delete_keys)
+                self._active_count -= cursor.rowcount
+            if start_rows:
+                cursor = await self.db.executemany(_INSERT_SESSION_SQL, start_rows)
+                self._active_count += cursor.rowcount
             await self.db.commit()
 
     async def start_session(self, guild_id: int, user_id: int, channel_id: int) -> None:
@@ -192,214 +396,154 @@ class VoiceTrackingService:
             await self.db.commit()
 
     async def end_session(self, guild_id: int, user_id: int) -> None:
-        now = datetime.now(timezone.utc)
+        now_ts = int(time.time())
         async with self.db_lock:
             assert self.db is not None
-            cursor = await self.db.execute(
-                "SELECT started_at FROM active_sessions WHERE guild_id = ? AND user_id = ?",
-                (guild_id, user_id),
-            )
-            row = await cursor.fetchone()
-            if row is None:
+            rows = await self.db.execute_fetchall(_SELECT_SESSION_START_SQL, (guild_id, user_id))
+            if not rows:
                 return
-            started_dt = datetime.fromisoformat(row[0])
-            await self._finalize_session_locked(guild_id, user_id, started_dt, now)
+            await self._finalize_session_locked(guild_id, user_id, rows[0][0], now_ts)
             await self.db.commit()
 
-    async def sync_active_sessions(self, guild_id: Optional[int] = None) -> None:
-        assert self.db is not None
-        now = datetime.now(timezone.utc)
-        query = "SELECT guild_id, user_id, started_at FROM active_sessions"
-        params: Sequence[int] = ()
-        if guild_id is not None:
-            query += " WHERE guild_id = ?"
-            params = (guild_id,)
-
+    async def move_session(self, guild_id: int, user_id: int, channel_id: int) -> None:
+        """Settle a member's session and continue it in another channel within one transaction."""
+        now_ts = int(time.time())
         async with self.db_lock:
-            cursor = await self.db.execute(query, params)
-            rows = await cursor.fetchall()
+            assert self.db is not None
+            rows = await self.db.execute_fetchall(_SELECT_SESSION_START_SQL, (guild_id, user_id))
+            if rows:
+                # 換頻道時直接就地更新頻道與起點，不必刪除後再新增
+                self._buffer_duration(guild_id, user_id, rows[0][0], now_ts)
+                await self.db.execute(_MOVE_SESSION_SQL, (channel_id, now_ts, guild_id, user_id))
+            else:
+                await self._start_session_locked(guild_id, user_id, channel_id)
+            await self.db.commit()
 
-        if not rows:
+    async def flush_pending(self, guild_id: Optional[int] = None) -> None:
+        """Write buffered session durations (optionally only one guild's) to voice_time."""
+        if not self._pending:
             return
+        assert self.db is not None
+        async with self.db_lock:
+            keys = [key for key in self._pending if guild_id is None or key[0] == guild_id]
+            if not keys:
+                return
+            params = []
+            for key in keys:
+                duration, timestamp = self._pending.pop(key)
+                params.append(_duration_params(key[0], key[1], duration, timestamp))
+            await self.db.executemany(_UPSERT_DURATION_SQL, params)
+            await self.db.commit()
 
-        now_iso = now.isoformat()
-        duration_updates: List[Tuple[int, int, int]] = []  # (guild_id, user_id, duration)
-        session_updates: List[Tuple[str, int, int]] = []   # (now_iso, guild_id, user_id)
-
-        for row in rows:
-            started_at = datetime.fromisoformat(row[2])
-            duration = int((now - started_at).total_seconds())
-            if duration <= 0:
-                continue
-            duration_updates.append((row[0], row[1], duration))
-            session_updates.append((now_iso, row[0], row[1]))
-
-        if not duration_updates:
+    async def sync_active_sessions(self, guild_id: Optional[int] = None) -> None:
+        assert self.db is not None
+        await self.flush_pending(guild_id)
+        if self._active_count == 0:
             return
+        now_ts = int(time.time())
+        params = {"now": now_ts, "now_iso": _iso_timestamp(now_ts), "guild_id": guild_id}
+        sync_sql, advance_sql = _SYNC_ALL_SESSIONS_SQL, _ADVANCE_ALL_SESSIONS_SQL
+        if guild_id is not None:
+            sync_sql, advance_sql = _SYNC_GUILD_SESSIONS_SQL, _ADVANCE_GUILD_SESSIONS_SQL
 
+        # 結算與推進起點在同一個交易內，以集合方式一次處理所有進行中的時段
         async with self.db_lock:
-            for gid, uid, dur in duration_updates:
-                await self._apply_duration(gid, uid, dur, now_iso)
-            await self.db.executemany(
-                "UPDATE active_sessions SET started_at = ? WHERE guild_id = ? AND user_id = ?",
-                session_updates,
-            )
+            await self.db.execute(sync_sql, params)
+            await self.db.execute(advance_sql, params)
             await self.db.commit()
 
     async def clear_guild_stats(self, guild_id: int) -> None:
         assert self.db is not None
         async with self.db_lock:
-            await self.db.execute("DELETE FROM voice_time WHERE guild_id = ?", (guild_id,))
-            await self.db.execute("DELETE FROM active_sessions WHERE guild_id = ?", (guild_id,))
+            for key in [key for key in self._pending if key[0] == guild_id]:
+                del self._pending[key]
+            await self.db.execute(_DELETE_GUILD_STATS_SQL, (guild_id,))
+            cursor = await self.db.execute(_DELETE_GUILD_SESSIONS_SQL, (guild_id,))
+            self._active_count -= cursor.rowcount
             await self.db.commit()
 
     async def _start_session_locked(self, guild_id: int, user_id: int, channel_id: int) -> None:
         assert self.db is not None
-        started_at = datetime.now(timezone.utc).isoformat()
-        await self.db.execute(
-            """
-            INSERT INTO active_sessions (guild_id, user_id, channel_id, started_at)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(guild_id, user_id) DO NOTHING
-            """,
-            (guild_id, user_id, channel_id, started_at),
-        )
+        started_ts = int(time.time())
+        cursor = await self.db.execute(_INSERT_SESSION_SQL, (guild_id, user_id, channel_id, started_ts))
+        self._active_count += cursor.rowcount
+
+    def _buffer_duration(self, guild_id: int, user_id: int, started_ts: int, ended_ts: int) -> None:
+        duration = ended_ts - started_ts
+        if duration > 0:
+            # 先累積在記憶體，由每分鐘的同步或查詢前的 flush_pending 一次寫入
+            key = (guild_id, user_id)
+            pending = self._pending.get(key)
+            self._pending[key] = (duration + (pending[0] if pending else 0), _iso_timestamp(ended_ts))
 
     async def _finalize_session_locked(
         self,
         guild_id: int,
         user_id: int,
-        started_at: datetime,
-        ended_at: datetime,
+        started_ts: int,
+        ended_ts: int,
     ) -> None:
         assert self.db is not None
-        duration = int((ended_at - started_at).total_seconds())
-        if duration > 0:
-            await self._apply_duration(guild_id, user_id, duration, ended_at.isoformat())
-        await self.db.execute(
-            "DELETE FROM active_sessions WHERE guild_id = ? AND user_id = ?",
-            (guild_id, user_id),
-        )
+        self._buffer_duration(guild_id, user_id, started_ts, ended_ts)
+        cursor = await self.db.execute(_DELETE_SESSION_SQL, (guild_id, user_id))
+        self._active_count -= cursor.rowcount
 
-    async def _apply_duration(self, guild_id: int, user_id: int, duration: int, timestamp: str) -> None:
-        assert self.db is not None
-        params = [(guild_id, user_id, bucket, duration, timestamp) for bucket in BUCKETS]
-        await self.db.executemany(
-            """
-            INSERT INTO voice_time (guild_id, user_id, bucket, seconds, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(guild_id, user_id, bucket)
-            DO UPDATE SET seconds = voice_time.seconds + excluded.seconds,
-                          updated_at = excluded.updated_at
-            """,
-            params,
-        )
+    # 唯讀查詢走唯讀連線且不取 db_lock：db_lock 只需保護寫入連線上「讀取後再寫入」的流程，
+    # 讀取在 WAL 下看到的是最後一次提交的快照，不必排在寫入之後等待
 
     async def fetch_leaderboard(self, guild_id: int, bucket: str) -> List[Tuple[int, int]]:
         assert self.db is not None
-        async with self.db_lock:
-            cursor = await self.db.execute(
-                """
-                SELECT user_id, seconds FROM voice_time
-                WHERE guild_id = ? AND bucket = ?
-                ORDER BY seconds DESC
-                LIMIT ?
-                """,
-                (guild_id, bucket, self.leaderboard_limit),
-            )
-            rows = await cursor.fetchall()
-            return [(row[0], row[1]) for row in rows]
+        await self.flush_pending(guild_id)
+        rows = await self._reader().execute_fetchall(_LEADERBOARD_SQL[bucket], (guild_id, self.leaderboard_limit))
+        return [(row[0], row[1]) for row in rows]
 
     async def fetch_user_position(self, guild_id: int, user_id: int, bucket: str) -> Optional[Tuple[int, int]]:
         assert self.db is not None
-        async with self.db_lock:
-            cursor = await self.db.execute(
-                """
-                SELECT seconds,
-                       (
-                           SELECT COUNT(*) + 1
-                           FROM voice_time vt2
-                           WHERE vt2.guild_id = voice_time.guild_id
-                             AND vt2.bucket = voice_time.bucket
-                             AND vt2.seconds > voice_time.seconds
-                       ) AS rank
-                FROM voice_time
-                WHERE guild_id = ? AND user_id = ? AND bucket = ?
-                """,
-                (guild_id, user_id, bucket),
-            )
-            row = await cursor.fetchone()
-            return (row[0], row[1]) if row else None
+        await self.flush_pending(guild_id)
+        rows = await self._reader().execute_fetchall(_USER_POSITION_SQL[bucket], (guild_id, user_id))
+        return (rows[0][0], rows[0][1]) if rows else None
 
     async def get_metadata(self, key: str) -> Optional[str]:
         assert self.db is not None
-        async with self.db_lock:
-            cursor = await self.db.execute("SELECT value FROM metadata WHERE key = ?", (key,))
-            row = await cursor.fetchone()
-            return row[0] if row else None
+        rows = await self._reader().execute_fetchall(_GET_METADATA_SQL, (key,))
+        return rows[0][0] if rows else None
 
     async def set_metadata(self, key: str, value: str) -> None:
         assert self.db is not None
         async with self.db_lock:
-            await self.db.execute(
-                """
-                INSERT INTO metadata (key, value)
-                VALUES (?, ?)
-                ON CONFLICT(key) DO UPDATE SET value = excluded.value
-                """,
-                (key, value),
-            )
+            await self.db.execute(_SET_METADATA_SQL, (key, value))
             await self.db.commit()
 
     async def handle_periodic_resets(self) -> None:
-        await self.sync_active_sessions()
         now_local = datetime.now(self.config.timezone)
-        await self._handle_weekly_reset(now_local)
-        await self._handle_monthly_reset(now_local)
-        await self._handle_yearly_reset(now_local)
-
-    async def _handle_weekly_reset(self, now_local: datetime) -> None:
-        if now_local.weekday() != 0:
-            return
-        week_label = now_local.date().isoformat()
-        last_reset = await self.get_metadata("weekly_reset")
-        if last_reset == week_label:
+        # 先只依日期判斷可能到期的區間；絕大多數分鐘都是空的，完全不必碰資料庫
+        candidates: Dict[str, str] = {}
+        if now_local.weekday() == 0:
+            candidates["weekly"] = now_local.date().isoformat()
+        if now_local.day == 1:
+            candidates["monthly"] = now_local.strftime("%Y-%m")
+            if now_local.month == 1:
+                candidates["yearly"] = now_local.strftime("%Y")
+        if not candidates:
             return
-        async with self.db_lock:
-            assert self.db is not None
-            await self.db.execute("DELETE FROM voice_time WHERE bucket = 'weekly'")
-            await self.db.commit()
-        await self.set_metadata("weekly_reset", week_label)
-        log.info("Weekly stats reset at %s", week_label)
 
-    async def _handle_monthly_reset(self, now_local: datetime) -> None:
-        if now_local.day != 1:
-            return
-        month_label = now_local.strftime("%Y-%m")
-        last_reset = await self.get_metadata("monthly_reset")
-        if last_reset == month_label:
+        assert self.db is not None
+        last_resets = {row[0]: row[1] for row in await self.db.execute_fetchall(_SELECT_RESET_MARKERS_SQL)}
+        due = [(bucket, label) for bucket, label in candidates.items() if last_resets.get(f"{bucket}_reset") != label]
+        if not due:
             return
-        async with self.db_lock:
-            assert self.db is not None
-            await self.db.execute("DELETE FROM voice_time WHERE bucket = 'monthly'")
-            await self.db.commit()
-        await self.set_metadata("monthly_reset", month_label)
-        log.info("Monthly stats reset at %s", month_label)
 
-    async def _handle_yearly_reset(self, now_local: datetime) -> None:
-        if now_local.month != 1 or now_local.day != 1:
-            return
-        year_label = now_local.strftime("%Y")
-        last_reset = await self.get_metadata("yearly_reset")
-        if last_reset == year_label:
-            return
+        # 重置前先把進行中的時數記入，所有區間的重置與 metadata 在同一個交易內完成
+        await self.sync_active_sessions()
         async with self.db_lock:
-            assert self.db is not None
-            await self.db.execute("DELETE FROM voice_time WHERE bucket = 'yearly'")
+            for bucket, _ in due:
+                await self.db.execute(_RESET_BUCKET_SQL[bucket])
+            await self.db.executemany(_SET_METADATA_SQL, [(f"{bucket}_reset", label) for bucket, label in due])
             await self.db.commit()
-        await self.set_metadata("yearly_reset", year_label)
-        log.info("Yearly stats reset at %s", year_label)
-
+            # 重置後資料分布大幅改變，更新查詢規劃統計
+            await self.db.execute("PRAGMA optimize;")
+        for bucket, label in due:
+            log.info("%s stats reset at %s", bucket.capitalize(), label)
 
 def register_application_commands(
     bot: "VoiceTimeBot", service: VoiceTrackingService, timezone_obj: timezone
@@ -445,13 +589,16 @@ def register_application_commands(
             )
 
         if top_rows:
-            lines = []
-            for idx, (user_id, seconds) in enumerate(top_rows, start=1):
-                member = interaction.guild.get_member(user_id)
-                member_name = member.display_name if member else f"User {user_id}"
-                member_name = discord.utils.escape_markdown(member_name)
-                marker = "⭐" if subject and user_id == subject.id else ""
-                lines.append(f"{marker}`#{idx}` **{member_name}** — {humanize_duration(seconds)}")
+            # 迴圈外先取出常用的屬性與函式
+            get_member = interaction.guild.get_member
+            escape = discord.utils.escape_markdown
+            subject_id = subject.id
+            lines = [
+                f"{'⭐' if user_id == subject_id else ''}`#{idx}` "
+                f"**{escape(member.display_name if (member := get_member(user_id)) else f'User {user_id}')}**"
+                f" — {humanize_duration(seconds)}"
+                for idx, (user_id, seconds) in enumerate(top_rows, start=1)
+            ]
             embed.add_field(name="排行榜", value="\n".join(lines), inline=False)
         else:
             embed.add_field(name="排行榜", value="目前沒有統計資料。", inline=False)
@@ -599,8 +746,7 @@ class VoiceTimeBot(commands.Bot):
         elif before.channel is not None and after.channel is None:
             await self.service.end_session(member.guild.id, member.id)
         elif before.channel and after.channel and before.channel.id != after.channel.id:
-            await self.service.end_session(member.guild.id, member.id)
-            await self.service.start_session(member.guild.id, member.id, after.channel.id)
+            await self.service.move_session(member.guild.id, member.id, after.channel.id)
 
     @tasks.loop(minutes=1)
     async def session_flush_loop(self) -> None:
@@ -1,5 +1,5 @@
 """Weather feature package - 中央氣象署天氣預報功能"""
 
-from .weather import register_weather_commands
+from .weather import register_weather_commands, setup_weather_feature
 
-__all__ = ["register_weather_commands"]
+__all__ = ["register_weather_commands", "setup_weather_feature"]
@@ -9,13 +9,20 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import re
+import ssl
 import time
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import zip_longest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
+import certifi
 import discord
 import httpx
+import orjson
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
@@ -39,11 +46,22 @@ OBSERVATION_ENDPOINT = f"{CWA_BASE_URL}/O-A0003-001"  # 即時觀測
 FORECAST_CACHE_TTL = 600   # 預報快取 10 分鐘
 OBS_CACHE_TTL = 120        # 觀測快取 2 分鐘
 
+# 背景刷新：每 REFRESH_INTERVAL 秒檢查一次，快取剩不到 REFRESH_AHEAD 秒就先更新
+REFRESH_INTERVAL = 15
+REFRESH_AHEAD = 30
+
+# 磁碟快取目錄：重新啟動後仍可沿用尚未過期的 API 原始回應
+CACHE_DIR = Path(os.getenv("CWA_CACHE_DIR", ".cache/cwa"))
+
 # HTTP 設定
 HEADERS = {"User-Agent": "DiscordWeatherBot/1.0", "Accept": "application/json"}
 TIMEOUT = httpx.Timeout(20.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
 MAX_RETRIES = 2
 
+# 使用 certifi 的 CA 憑證，避免 Windows 系統憑證缺漏；只解析一次
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
 # 時區
 try:
     from zoneinfo import ZoneInfo
@@ -91,14 +109,38 @@ WEATHER_COLOR_MAP: Dict[str, int] = {
     "霧": 0xD3D3D3,      # 淺灰色
 }
 
+
+def _keyword_pattern(keywords: Dict[str, Any]) -> re.Pattern:
+    """把對照表的關鍵字編成單一 regex；較長的關鍵字排前面，同位置優先取最具體的描述"""
+    return re.compile("|".join(re.escape(key) for key in sorted(keywords, key=len, reverse=True)))
+
+
+_EMOJI_RE = _keyword_pattern(WEATHER_EMOJI_MAP)
+_COLOR_RE = _keyword_pattern(WEATHER_COLOR_MAP)
+# 顏色依對照表順序決定優先權（晴 > 多雲 > 陰 > 雨 > 雷 > 霧），不看出現位置
+_COLOR_PRIORITY: Dict[str, int] = {key: rank for rank, key in enumerate(WEATHER_COLOR_MAP)}
+
+
+# 天氣描述只有幾十種組合，查詢結果直接快取
+@lru_cache(maxsize=256)
+def get_weather_meta(description: str) -> Tuple[str, int]:
+    """根據天氣描述同時取得 (emoji, 顏色)"""
+    text = description or ""
+    emoji_match = _EMOJI_RE.search(text)
+    color_key = min(
+        (match.group(0) for match in _COLOR_RE.finditer(text)),
+        key=_COLOR_PRIORITY.__getitem__,
+        default=None,
+    )
+    return (
+        WEATHER_EMOJI_MAP[emoji_match.group(0)] if emoji_match else "🌈",
+        WEATHER_COLOR_MAP[color_key] if color_key else 0x87CEEB,
+    )
+
+
 def get_weather_color(description: str) -> int:
     """根據天氣描述取得對應顏色"""
-    if not description:
-        return 0x87CEEB
-    for key, color in WEATHER_COLOR_MAP.items():
-        if key in description:
-            return color
-    return 0x87CEEB
+    return get_weather_meta(description)[1]
 
 # 台灣縣市列表
 TAIWAN_CITIES = [
@@ -108,15 +150,31 @@ TAIWAN_CITIES = [
     "臺中市", "臺南市", "連江縣", "金門縣",
 ]
 
+# 正規化（台→臺）後的縣市名稱 → 正式名稱，精確匹配只需一次查表
+_NORMALIZED_CITIES: Dict[str, str] = {city.replace("台", "臺"): city for city in TAIWAN_CITIES}
+
+# 自動完成用：預先轉小寫的縣市名稱與對應選項，每次按鍵不必重算
+_CITY_CHOICES: List[Tuple[str, app_commands.Choice[str]]] = [
+    (city.lower(), app_commands.Choice(name=city, value=city)) for city in TAIWAN_CITIES
+]
+_ALL_CITY_CHOICES: List[app_commands.Choice[str]] = [choice for _, choice in _CITY_CHOICES[:25]]
+
 
 def get_weather_emoji(description: str) -> str:
     """根據天氣描述取得對應 emoji"""
-    if not description:
-        return "🌈"
-    for key, emoji in WEATHER_EMOJI_MAP.items():
-        if key in description:
-            return emoji
-    return "🌈"
+    return get_weather_meta(description)[0]
+
+
+# 地名正規化（台→臺）；測站資料裡同一縣市名稱重複出現數百次，結果直接快取
+@lru_cache(maxsize=256)
+def _normalize_name(name: str) -> str:
+    return name.strip().replace("台", "臺")
+
+
+# 相鄰時段的 EndTime 就是下一段的 StartTime，且各縣市共用同一組時間字串
+@lru_cache(maxsize=256)
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value)
 
 
 # ============ 資料類別 ============
@@ -126,9 +184,14 @@ class WeatherError(Exception):
     pass
 
 
-@dataclass
+# 資料類別建立後不再修改；需支援 Python 3.9，因此手動宣告 __slots__ 而非 dataclass(slots=True)
+@dataclass(frozen=True)
 class HourlyForecast:
     """逐3小時預報"""
+    __slots__ = (
+        "time_label", "weather", "emoji", "temperature", "feels_like", "humidity", "rain_prob",
+    )
+    
     time_label: str        # 時間標籤
     weather: str           # 天氣描述
     emoji: str             # 天氣 emoji
@@ -138,9 +201,13 @@ class HourlyForecast:
     rain_prob: int         # 降雨機率 %
 
 
-@dataclass
+@dataclass(frozen=True)
 class Observation:
     """即時觀測資料"""
+    __slots__ = (
+        "station_name", "temperature", "humidity", "wind_speed", "weather_desc", "observed_at",
+    )
+    
     station_name: str
     temperature: float        # 溫度 °C
     humidity: Optional[float]  # 濕度 %
@@ -149,9 +216,11 @@ class Observation:
     observed_at: datetime
 
 
-@dataclass
+@dataclass(frozen=True)
 class WeatherReport:
     """完整天氣報告"""
+    __slots__ = ("location", "timezone_name", "observation", "forecasts")
+    
     location: str                      # 縣市
     timezone_name: str
     observation: Optional[Observation]  # 即時觀測
@@ -163,6 +232,40 @@ class CacheEntry:
     """快取項目"""
     data: Any
     expires_at: float
+    etag: Optional[str] = None           # 回應的 ETag，供條件式請求使用
+    last_modified: Optional[str] = None  # 回應的 Last-Modified
+
+
+def _read_disk_cache(name: str, ttl: int) -> Optional[CacheEntry]:
+    """讀取磁碟快取；檔案不存在、過期或損毀時回傳 None"""
+    path = CACHE_DIR / f"{name}.json"
+    try:
+        expires_at = path.stat().st_mtime + ttl
+        if expires_at <= time.time():
+            return None
+        return CacheEntry(data=orjson.loads(path.read_bytes()), expires_at=expires_at)
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def _write_disk_cache(name: str, content: bytes) -> None:
+    """寫入磁碟快取（先寫暫存檔再取代，避免讀到寫一半的檔案）"""
+    path = CACHE_DIR / f"{name}.json"
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+    except OSError as e:
+        log.warning("Failed to write weather cache %s: %s", path, e)
+
+
+def _touch_disk_cache(name: str) -> None:
+    """資料未變更（304）時更新磁碟快取的修改時間，延長其有效期"""
+    try:
+        os.utime(CACHE_DIR / f"{name}.json")
+    except OSError as e:
+        log.warning("Failed to touch weather cache %s: %s", name, e)
 
 
 # ============ 天氣服務 ============
@@ -176,7 +279,13 @@ class WeatherService:
         self._client: Optional[httpx.AsyncClient] = None
         self._forecast_cache: Optional[CacheEntry] = None
         self._obs_cache: Optional[CacheEntry] = None
-        self._lock = asyncio.Lock()
+        # 各縣市已組好的報告，預報或觀測資料更新時整批作廢
+        self._report_cache: Dict[str, CacheEntry] = {}
+        # 正規化縣市名稱 → 預報地點 / 該縣市第一個測站，每次資料更新時重建一次
+        self._forecast_index: Dict[str, Dict] = {}
+        self._station_index: Dict[str, Dict] = {}
+        # 進行中的下載：同一資料的並行快取未命中共用同一個 Task，只打一次 API
+        self._inflight: Dict[str, asyncio.Task] = {}
     
     @classmethod
     def get_instance(cls) -> "WeatherService":
@@ -186,10 +295,13 @@ class WeatherService:
     
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
+            # 長駐連線池：重用 TCP/TLS 連線，HTTP/2 可在同一連線上多工
             self._client = httpx.AsyncClient(
+                http2=True,
                 timeout=TIMEOUT,
                 headers=HEADERS,
-                verify=False  # 跳過 SSL 驗證（Windows 憑證問題）
+                limits=HTTP_LIMITS,
+                verify=_SSL_CONTEXT,
             )
         return self._client
     
@@ -201,9 +313,38 @@ class WeatherService:
     def _is_valid(self, entry: Optional[CacheEntry]) -> bool:
         return entry is not None and entry.expires_at > time.time()
     
+    async def _run_once(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """合併同一 key 的並行下載，第一個呼叫者負責下載，其餘等待同一結果"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            
+            def _forget(done: asyncio.Task) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            
+            task.add_done_callback(_forget)
+        # shield：單一呼叫者被取消時不影響其他等待同一下載的人
+        return await asyncio.shield(task)
+    
+    async def refresh_loop(self) -> None:
+        """背景定期刷新預報與觀測，讓使用者查詢直接命中快取"""
+        while True:
+            deadline = time.time() + REFRESH_AHEAD
+            refreshes = []
+            if self._forecast_cache is None or self._forecast_cache.expires_at <= deadline:
+                refreshes.append(self._get_forecast_data(force=self._forecast_cache is not None))
+            if self._obs_cache is None or self._obs_cache.expires_at <= deadline:
+                refreshes.append(self._get_obs_data(force=self._obs_cache is not None))
+            for result in await asyncio.gather(*refreshes, return_exceptions=True):
+                if isinstance(result, Exception):
+                    log.warning("Weather cache refresh failed: %s", result)
+            await asyncio.sleep(REFRESH_INTERVAL)
+    
     def _normalize(self, name: str) -> str:
         """台→臺"""
-        return name.strip().replace("台", "臺")
+        return _normalize_name(name)
     
     async def fetch_weather(self, location: str) -> WeatherReport:
         """取得天氣報告"""
@@ -218,6 +359,10 @@ class WeatherService:
                 f"支援的縣市：{', '.join(TAIWAN_CITIES)}"
             )
         
+        cached = self._report_cache.get(city)
+        if self._is_valid(cached):
+            return cached.data
+        
         # 並行取得預報和觀測
         forecasts, observation = await asyncio.gather(
             self._fetch_forecasts(city),
@@ -225,83 +370,105 @@ class WeatherService:
             return_exceptions=True,
         )
         
+        failed = False
         if isinstance(forecasts, Exception):
             log.error("Forecast error: %s", forecasts)
             forecasts = []
+            failed = True
         if isinstance(observation, Exception):
             log.warning("Observation error: %s", observation)
             observation = None
+            failed = True
         
-        return WeatherReport(
+        report = WeatherReport(
             location=city,
             timezone_name="Asia/Taipei",
             observation=observation,
             forecasts=forecasts,
         )
+        # 只快取完整成功的報告，有效期限到兩份原始資料中較早過期者為止
+        if not failed and self._forecast_cache is not None and self._obs_cache is not None:
+            self._report_cache[city] = CacheEntry(
+                data=report,
+                expires_at=min(self._forecast_cache.expires_at, self._obs_cache.expires_at),
+            )
+        return report
     
     def _match_city(self, query: str) -> Optional[str]:
         """匹配縣市名稱"""
-        normalized = self._normalize(query)
+        normalized = query.strip().replace("台", "臺")
         
         # 精確匹配
-        for city in TAIWAN_CITIES:
-            if normalized == city:
-                return city
+        city = _NORMALIZED_CITIES.get(normalized)
+        if city is not None:
+            return city
         
         # 部分匹配
-        for city in TAIWAN_CITIES:
-            if normalized in city or city in normalized:
-                return city
-        
-        return None
+        return next(
+            (city for name, city in _NORMALIZED_CITIES.items() if normalized in name or name in normalized),
+            None,
+        )
     
     async def _fetch_forecasts(self, city: str) -> List[HourlyForecast]:
         """取得逐3小時預報"""
-        # 取得資料
-        data = await self._get_forecast_data()
-        
-        # 尋找縣市資料 (注意：API 回傳的 key 是 PascalCase)
-        locations_list = data.get("records", {}).get("Locations", [])
-        if not locations_list:
-            log.warning("No Locations in API response")
-            return []
-        
-        # F-D0047-089 的資料結構
-        all_locations = []
-        for loc_group in locations_list:
-            all_locations.extend(loc_group.get("Location", []))
-        
-        # 找到該縣市
-        target = None
-        normalized_city = self._normalize(city)
-        for loc in all_locations:
-            loc_name = self._normalize(loc.get("LocationName", ""))
-            if loc_name == normalized_city:
-                target = loc
-                break
+        await self._get_forecast_data()
         
+        target = self._forecast_index.get(self._normalize(city))
         if not target:
             log.warning("City not found in forecast: %s", city)
             return []
         
         return self._parse_forecasts(target)
     
-    async def _get_forecast_data(self) -> Dict:
-        """取得預報資料（有快取）"""
-        if self._is_valid(self._forecast_cache):
+    async def _get_forecast_data(self, force: bool = False) -> Dict:
+        """取得預報資料（有快取；force 時略過記憶體快取重新下載）"""
+        if not force and self._is_valid(self._forecast_cache):
             return self._forecast_cache.data
+        return await self._run_once("forecast", self._load_forecast_data)
+    
+    async def _load_forecast_data(self) -> Dict:
+        """下載預報資料並更新快取與索引"""
+        # 啟動後第一次查詢先看磁碟快取
+        entry = None
+        if self._forecast_cache is None:
+            entry = await asyncio.to_thread(_read_disk_cache, "forecast", FORECAST_CACHE_TTL)
+        
+        if entry is None:
+            client = await self._get_client()
+            params = {"Authorization": CWA_API_KEY, "format": "JSON"}
+            
+            response = await self._request(client, FORECAST_ENDPOINT, params, self._forecast_cache)
+            if response is None:
+                # 資料未變更：沿用舊資料與索引，只延長有效期
+                self._forecast_cache.expires_at = time.time() + FORECAST_CACHE_TTL
+                await asyncio.to_thread(_touch_disk_cache, "forecast")
+                return self._forecast_cache.data
+            data = orjson.loads(response.content)
+            await asyncio.to_thread(_write_disk_cache, "forecast", response.content)
+            entry = CacheEntry(
+                data=data,
+                expires_at=time.time() + FORECAST_CACHE_TTL,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
         
-        client = await self._get_client()
-        params = {"Authorization": CWA_API_KEY, "format": "JSON"}
-        
-        response = await self._request(client, FORECAST_ENDPOINT, params)
-        data = response.json()
+        self._forecast_cache = entry
+        self._forecast_index = self._index_forecast_locations(entry.data)
+        self._report_cache.clear()
+        return entry.data
+    
+    def _index_forecast_locations(self, data: Dict) -> Dict[str, Dict]:
+        """以正規化縣市名稱建立預報地點索引 (注意：API 回傳的 key 是 PascalCase)"""
+        locations_list = data.get("records", {}).get("Locations", [])
+        if not locations_list:
+            log.warning("No Locations in API response")
         
-        self._forecast_cache = CacheEntry(
-            data=data,
-            expires_at=time.time() + FORECAST_CACHE_TTL
-        )
-        return data
+        # F-D0047-089 的資料結構；同名地點以第一筆為準
+        index: Dict[str, Dict] = {}
+        for loc_group in locations_list:
+            for loc in loc_group.get("Location", []):
+                index.setdefault(_normalize_name(loc.get("LocationName", "")), loc)
+        return index
     
     def _parse_forecasts(self, location_data: Dict) -> List[HourlyForecast]:
         """解析預報資料 (PascalCase keys, 中文 ElementName)"""
@@ -312,6 +479,13 @@ class WeatherService:
         }
         
         now = datetime.now(TAIWAN_TZ)
+        today = now.date()
+        # 今天／明天／後天的日期只算一次
+        day_map = {
+            today: "今天",
+            today + timedelta(days=1): "明天",
+            today + timedelta(days=2): "後天",
+        }
         forecasts: List[HourlyForecast] = []
         
         # 天氣現象
@@ -321,14 +495,17 @@ class WeatherService:
         rh_times = elements.get("相對濕度", [])    # 濕度
         pop_times = elements.get("3小時降雨機率", [])
         
-        for idx, wx_item in enumerate(wx_times):
+        # 五種元素按時段對齊，一次走訪；較短的序列以空 dict 補齊
+        for wx_item, t_item, at_item, rh_item, pop_item in zip_longest(
+            wx_times, t_times, at_times, rh_times, pop_times, fillvalue={}
+        ):
             start_str = wx_item.get("StartTime", "")
             end_str = wx_item.get("EndTime", "")
             
             try:
                 # ISO 格式帶時區
-                start = datetime.fromisoformat(start_str)
-                end = datetime.fromisoformat(end_str)
+                start = _parse_iso(start_str)
+                end = _parse_iso(end_str)
             except ValueError:
                 continue
             
@@ -342,23 +519,23 @@ class WeatherService:
             emoji = get_weather_emoji(weather)
             
             # 溫度
-            temp = self._get_value_at_pascal(t_times, idx, "Temperature")
+            temp = self._element_value(t_item, "Temperature")
             temperature = float(temp) if temp else 0.0
             
             # 體感溫度
-            at = self._get_value_at_pascal(at_times, idx, "ApparentTemperature")
+            at = self._element_value(at_item, "ApparentTemperature")
             feels_like = float(at) if at else None
             
             # 濕度
-            rh = self._get_value_at_pascal(rh_times, idx, "RelativeHumidity")
+            rh = self._element_value(rh_item, "RelativeHumidity")
             humidity = int(rh) if rh and str(rh).isdigit() else None
             
             # 降雨機率
-            pop = self._get_value_at_pascal(pop_times, idx, "ProbabilityOfPrecipitation")
+            pop = self._element_value(pop_item, "ProbabilityOfPrecipitation")
             rain_prob = int(pop) if pop and str(pop).isdigit() else 0
             
             # 時間標籤
-            time_label = self._format_label(now, start)
+            time_label = self._format_label(day_map, start)
             
             forecasts.append(HourlyForecast(
                 time_label=time_label,
@@ -372,68 +549,79 @@ class WeatherService:
         
         return forecasts
     
-    def _get_value_at_pascal(self, times: List[Dict], idx: int, key: str) -> Optional[str]:
-        """取得指定索引的值 (PascalCase)"""
-        if idx >= len(times):
-            return None
-        vals = times[idx].get("ElementValue", [])
+    def _element_value(self, item: Dict, key: str) -> Optional[str]:
+        """取得時段的元素值 (PascalCase)"""
+        vals = item.get("ElementValue", [])
         if vals and isinstance(vals, list) and vals[0]:
             return vals[0].get(key)
         return None
     
-    def _format_label(self, now: datetime, target: datetime) -> str:
+    def _format_label(self, day_map: Dict[date, str], target: datetime) -> str:
         """格式化時間標籤"""
-        if target.date() == now.date():
-            prefix = "今天"
-        elif target.date() == (now + timedelta(days=1)).date():
-            prefix = "明天"
-        elif target.date() == (now + timedelta(days=2)).date():
-            prefix = "後天"
-        else:
-            prefix = target.strftime("%m/%d")
+        prefix = day_map.get(target.date()) or target.strftime("%m/%d")
         return f"{prefix} {target.strftime('%H:%M')}"
     
     async def _fetch_observation(self, city: str) -> Optional[Observation]:
         """取得即時觀測"""
         try:
-            data = await self._get_obs_data()
-            
-            # 注意：觀測資料可能是不同的 key 結構
-            stations = data.get("records", {}).get("Station", [])
-            if not stations:
-                # 嘗試其他可能的 key
-                stations = data.get("records", {}).get("station", [])
-            
-            normalized = self._normalize(city)
+            await self._get_obs_data()
             
-            # 找該縣市的測站
-            for station in stations:
-                geo = station.get("GeoInfo", {}) or station.get("geoInfo", {})
-                county = geo.get("CountyName", "") or geo.get("countyName", "")
-                if self._normalize(county) == normalized:
-                    return self._parse_observation(station)
-            
-            return None
+            station = self._station_index.get(self._normalize(city))
+            return self._parse_observation(station) if station else None
         except Exception as e:
             log.warning("Observation fetch failed: %s", e)
             return None
     
-    async def _get_obs_data(self) -> Dict:
-        """取得觀測資料（有快取）"""
-        if self._is_valid(self._obs_cache):
+    async def _get_obs_data(self, force: bool = False) -> Dict:
+        """取得觀測資料（有快取；force 時略過記憶體快取重新下載）"""
+        if not force and self._is_valid(self._obs_cache):
             return self._obs_cache.data
+        return await self._run_once("observation", self._load_obs_data)
+    
+    async def _load_obs_data(self) -> Dict:
+        """下載觀測資料並更新快取與索引"""
+        entry = None
+        if self._obs_cache is None:
+            entry = await asyncio.to_thread(_read_disk_cache, "observation", OBS_CACHE_TTL)
         
-        client = await self._get_client()
-        params = {"Authorization": CWA_API_KEY, "format": "JSON"}
-        
-        response = await self._request(client, OBSERVATION_ENDPOINT, params)
-        data = response.json()
+        if entry is None:
+            client = await self._get_client()
+            params = {"Authorization": CWA_API_KEY, "format": "JSON"}
+            
+            response = await self._request(client, OBSERVATION_ENDPOINT, params, self._obs_cache)
+            if response is None:
+                # 資料未變更：沿用舊資料與索引，只延長有效期
+                self._obs_cache.expires_at = time.time() + OBS_CACHE_TTL
+                await asyncio.to_thread(_touch_disk_cache, "observation")
+                return self._obs_cache.data
+            data = orjson.loads(response.content)
+            await asyncio.to_thread(_write_disk_cache, "observation", response.content)
+            entry = CacheEntry(
+                data=data,
+                expires_at=time.time() + OBS_CACHE_TTL,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
         
-        self._obs_cache = CacheEntry(
-            data=data,
-            expires_at=time.time() + OBS_CACHE_TTL
-        )
-        return data
+        self._obs_cache = entry
+        self._station_index = self._index_stations(entry.data)
+        self._report_cache.clear()
+        return entry.data
+    
+    def _index_stations(self, data: Dict) -> Dict[str, Dict]:
+        """以正規化縣市名稱建立測站索引，每個縣市取第一個測站"""
+        # 注意：觀測資料可能是不同的 key 結構
+        stations = data.get("records", {}).get("Station", [])
+        if not stations:
+            # 嘗試其他可能的 key
+            stations = data.get("records", {}).get("station", [])
+        
+        index: Dict[str, Dict] = {}
+        for station in stations:
+            geo = station.get("GeoInfo", {}) or station.get("geoInfo", {})
+            county = geo.get("CountyName", "") or geo.get("countyName", "")
+            index.setdefault(_normalize_name(county), station)
+        return index
     
     def _parse_observation(self, station: Dict) -> Observation:
         """解析觀測站資料"""
@@ -442,7 +630,7 @@ class WeatherService:
         obs_time_str = obs_time_data.get("DateTime", "") or obs_time_data.get("dateTime", "")
         
         try:
-            obs_time = datetime.fromisoformat(obs_time_str.replace("Z", "+00:00"))
+            obs_time = _parse_iso(obs_time_str.replace("Z", "+00:00"))
             obs_time = obs_time.astimezone(TAIWAN_TZ)
         except ValueError:
             obs_time = datetime.now(TAIWAN_TZ)
@@ -472,12 +660,27 @@ class WeatherService:
             observed_at=obs_time,
         )
     
-    async def _request(self, client: httpx.AsyncClient, url: str, params: Dict) -> httpx.Response:
-        """HTTP 請求（含重試）"""
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        params: Dict,
+        cached: Optional[CacheEntry] = None,
+    ) -> Optional[httpx.Response]:
+        """HTTP 請求（含重試）；帶入舊快取時發送條件式請求，資料未變更回傳 None"""
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        
         last_exc: Optional[Exception] = None
         for attempt in range(MAX_RETRIES):
             try:
-                response = await client.get(url, params=params)
+                response = await client.get(url, params=params, headers=headers)
+                if headers and response.status_code == httpx.codes.NOT_MODIFIED:
+                    return None
                 response.raise_for_status()
                 return response
             except (httpx.HTTPStatusError, httpx.RequestError) as e:
@@ -493,14 +696,18 @@ def get_weather_service() -> WeatherService:
 
 # ============ Discord 整合 ============
 
+# 逐時段預報的單行格式：時間、emoji、溫度、降雨標示、降雨機率
+_FORECAST_LINE = "`{:^12}` {} {:>4.0f}°C {}{:>2}%".format
+
 def _build_weather_embed(report: WeatherReport) -> discord.Embed:
     """建立天氣預報 Embed"""
     # 即時觀測 or 第一筆預報
     obs = report.observation
     first_fc = report.forecasts[0] if report.forecasts else None
     
+    # 根據天氣設定 emoji 與顏色
     if obs:
-        current_emoji = get_weather_emoji(obs.weather_desc)
+        current_emoji, embed_color = get_weather_meta(obs.weather_desc)
         current_desc = obs.weather_desc
         current_temp = obs.temperature
         feels_like = first_fc.feels_like if first_fc else None
@@ -509,6 +716,7 @@ def _build_weather_embed(report: WeatherReport) -> discord.Embed:
         rain_prob = first_fc.rain_prob if first_fc else None
     elif first_fc:
         current_emoji = first_fc.emoji
+        embed_color = get_weather_color(first_fc.weather)
         current_desc = first_fc.weather
         current_temp = first_fc.temperature
         feels_like = first_fc.feels_like
@@ -516,7 +724,7 @@ def _build_weather_embed(report: WeatherReport) -> discord.Embed:
         wind_speed = None
         rain_prob = first_fc.rain_prob
     else:
-        current_emoji = "🌈"
+        current_emoji, embed_color = get_weather_meta("-")
         current_desc = "-"
         current_temp = 0.0
         feels_like = None
@@ -524,9 +732,6 @@ def _build_weather_embed(report: WeatherReport) -> discord.Embed:
         wind_speed = None
         rain_prob = None
     
-    # 根據天氣設定顏色
-    embed_color = get_weather_color(current_desc)
-    
     embed = discord.Embed(
         title=f"{current_emoji} {report.location} 天氣預報",
         color=embed_color,
@@ -578,8 +783,9 @@ def _build_weather_embed(report: WeatherReport) -> discord.Embed:
         for fc in report.forecasts[:8]:
             # 使用更緊湊的格式
             rain_indicator = "☔" if fc.rain_prob >= 50 else "　"
-            line = f"`{fc.time_label:^12}` {fc.emoji} {fc.temperature:>4.0f}°C {rain_indicator}{fc.rain_prob:>2}%"
-            forecast_lines.append(line)
+            forecast_lines.append(
+                _FORECAST_LINE(fc.time_label, fc.emoji, fc.temperature, rain_indicator, fc.rain_prob)
+            )
         
         # 標題行
         header = "```\n時間          天氣   溫度   降雨\n" + "─" * 32 + "\n```"
@@ -638,14 +844,36 @@ async def location_autocomplete(
 ) -> List[app_commands.Choice[str]]:
     """地點自動完成"""
     normalized = current.strip().replace("台", "臺").lower()
-    matches = [
-        city for city in TAIWAN_CITIES
-        if normalized in city.lower() or not current
-    ]
-    return [
-        app_commands.Choice(name=city, value=city)
-        for city in matches[:25]
-    ]
+    if not normalized:
+        return _ALL_CITY_CHOICES
+    matches = [choice for name, choice in _CITY_CHOICES if normalized in name]
+    return matches[:25]
+
+
+class WeatherCog(commands.Cog):
+    """天氣服務的生命週期；啟動時建立 HTTP 連線池並開始背景刷新，卸載時（含 bot.close）關閉"""
+    
+    def __init__(self) -> None:
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        service = get_weather_service()
+        await service._get_client()
+        # on_ready 在斷線重連後也會觸發，只啟動一次；沒有 API 金鑰時不必刷新
+        if self._refresh_task is None and CWA_API_KEY:
+            self._refresh_task = asyncio.create_task(service.refresh_loop())
+    
+    async def cog_unload(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        await get_weather_service().close()
+
+
+async def setup_weather_feature(bot: commands.Bot) -> None:
+    """掛上天氣服務的啟動與關閉處理"""
+    await bot.add_cog(WeatherCog())
 
 
 def register_weather_commands(bot: commands.Bot) -> None: